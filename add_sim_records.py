@@ -6,6 +6,7 @@ import textwrap
 from src.db_parser.lexer import Lexer
 from src.db_parser.parser import Parser
 from src.grouper import Grouper
+from src.names import analyse_name
 
 # Only add SIM fields if type is one of the following:
 ALLOWED_SIM_TYPES = [
@@ -24,11 +25,9 @@ ALLOWED_SIM_TYPES = [
 
 
 def find_macro(name):
-    if name.find("$") != -1:
-        left = name.rfind(")") + 1
-        macro = name[:left]
-        pvname = name[left:]
-        return macro, pvname
+    info = analyse_name(name)
+    if info.has_macro:
+        return info.macro, info.base
     return None
 
 
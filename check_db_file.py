@@ -1,16 +1,24 @@
 import argparse
 import glob
+import hashlib
 import os
 import sys
 import unittest
-from typing import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Iterator
 
 import xmlrunner
 
-from src.db_checker import DbCheckerTests
-from src.db_parser.common import DbSyntaxError
+from src.db_checker import DbCheckerTests, ProjectCheckerTests
+from src.db_parser.common import DbSyntaxError, SerialisationError
+from src.db_parser.epics_collections import Db, Project
 from src.db_parser.lexer import Lexer
+from src.db_parser.parser import VERSION as PARSER_VERSION
 from src.db_parser.parser import Parser
+from src.db_parser.serialisation import MAGIC, dumps, load_db
+from src.pv_checks import CheckResultCache, CheckStats, configure_rules, select_checks
+from src.rules import RulesError, load_rules
 
 DIRECTORIES_TO_ALWAYS_IGNORE = [
     ".git",
@@ -95,22 +103,187 @@ DIRECTORIES_TO_IGNORE_STRICT = [
 ]
 output_dir = ""
 
+# The phases of checking a file, which can be chosen with --only and --skip
+PHASES = ("parse", "pv", "syntax")
+
+
+def get_parse_cache_prefix(filename: str) -> str:
+    """
+    Returns the start of the names of the parse cache entries of a file, so that old entries
+    can be removed when the file changes.
+    """
+    return hashlib.sha1(os.path.abspath(filename).encode("utf-8")).hexdigest() + "-"
+
+
+def get_parse_cache_file(filename: str, contents: str, cache_dir: str) -> str:
+    """
+    Returns the path a parse of the given file contents is cached at. The key includes the
+    parser and serialisation format versions, so changes to either do not reuse old parses.
+    """
+    key = "{}\0{}\0{}".format(PARSER_VERSION, MAGIC.hex(), contents)
+    return os.path.join(
+        cache_dir,
+        get_parse_cache_prefix(filename) + hashlib.sha1(key.encode("utf-8")).hexdigest() + ".dbc",
+    )
+
+
+def remove_old_parse_cache_files(filename: str, cache_file: str, cache_dir: str) -> None:
+    """
+    Removes the entries cached for earlier contents of a file, so the cache holds at most one
+    parse of each file.
+    """
+    prefix = get_parse_cache_prefix(filename)
+    for entry in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, entry)
+        if entry.startswith(prefix) and entry.endswith(".dbc") and path != cache_file:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def parse_db_file(filename: str, cache_dir: str | None = None, use_cached: bool = True) -> bytes:
+    """
+    Parses a db file, returning it in the serialised form used to pass dbs between processes.
+    If a cache directory is given, the latest parse of each file is cached in it, keyed on the
+    file's path and contents, and the cached parse is returned unless use_cached is False.
+    """
+    with open(filename) as db_file:
+        contents = db_file.read()
+    if cache_dir is None:
+        return dumps(Parser(Lexer(contents)).db())
+    cache_file = get_parse_cache_file(filename, contents, cache_dir)
+    if use_cached and os.path.exists(cache_file):
+        with open(cache_file, "rb") as cached:
+            return cached.read()
+    data = dumps(Parser(Lexer(contents)).db())
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write to a temporary file first so other workers never read a partial file
+    temporary_file = "{}.{}".format(cache_file, os.getpid())
+    with open(temporary_file, "wb") as cached:
+        cached.write(data)
+    os.replace(temporary_file, cache_file)
+    remove_old_parse_cache_files(filename, cache_file, cache_dir)
+    return data
+
+
+def load_parsed_db(filename: str, data: bytes, cache_dir: str | None = None) -> Db:
+    """
+    Loads a db returned by parse_db_file. A corrupt cache entry is treated as a cache miss, so
+    the file is parsed again and the entry replaced.
+    """
+    try:
+        return load_db(data)
+    except SerialisationError:
+        return load_db(parse_db_file(filename, cache_dir, use_cached=False))
+
+
+def load_parse_result(filename: str, future: Future[bytes], cache_dir: str | None) -> Db:
+    return load_parsed_db(filename, future.result(), cache_dir)
+
+
+def load_cached_db(filename: str, cache_dir: str) -> Db:
+    return load_parsed_db(filename, parse_db_file(filename, cache_dir), cache_dir)
+
+
+def parse_db_files(
+    db_files: list[str], jobs: int = 1, cache_dir: str | None = None
+) -> Iterator[tuple[str, Callable[[], Db]]]:
+    """
+    Yields (filename, parse) for each db file, where calling parse returns the parsed db or
+    raises the error from parsing it. Files are parsed by a pool of worker processes if jobs
+    is more than one. A file given more than once (e.g. by -d and -f) is only yielded once.
+    """
+    filenames = list(dict.fromkeys(os.path.abspath(filename) for filename in db_files))
+    if jobs > 1:
+        with ProcessPoolExecutor(jobs) as pool:
+            futures = [pool.submit(parse_db_file, filename, cache_dir) for filename in filenames]
+            for filename, future in zip(filenames, futures):
+                yield filename, partial(load_parse_result, filename, future, cache_dir)
+    elif cache_dir is not None:
+        for filename in filenames:
+            yield filename, partial(load_cached_db, filename, cache_dir)
+    else:
+        for filename in filenames:
+            yield filename, partial(parse_uncached, filename)
+
+
+def parse_uncached(filename: str) -> Db:
+    with open(filename) as db_file:
+        return Parser(Lexer(db_file.read())).db()
+
+
+def select_phases(
+    only: list[str] | None, skip: list[str] | None
+) -> tuple[set[str], list[str] | None]:
+    """
+    Splits names given to --only and --skip into phases and pv checks. Returns the phases to
+    run and the names of the pv checks to run, or None to run them all. Naming a pv check in
+    --only selects the pv phase. Raises ValueError for names that are not phases or checks, or
+    if the parse phase is skipped, as every other phase needs the parsed dbs.
+    """
+    if "parse" in (skip or []):
+        raise ValueError("The parse phase cannot be skipped")
+    only_checks = [name for name in only or [] if name not in PHASES]
+    skip_checks = [name for name in skip or [] if name not in PHASES]
+    if only is None:
+        phases = set(PHASES)
+    else:
+        phases = {name for name in only if name in PHASES} | {"parse"}
+        if only_checks:
+            phases.add("pv")
+    phases -= {name for name in skip or [] if name in PHASES}
+    checks = None
+    if only_checks or skip_checks:
+        checks = select_checks(only_checks or None, skip_checks or None)
+    return phases, checks
+
 
 # return False if all OK, True on error
 def check_files(
-    db_files: list[str], strict: list[str], verbose: bool, strict_error: bool = False
+    db_files: list[str],
+    strict: list[str],
+    verbose: bool,
+    strict_error: bool = False,
+    jobs: int = 1,
+    cache_dir: str | None = None,
+    stats: CheckStats | None = None,
+    check_cache: CheckResultCache | None = None,
+    phases: frozenset[str] | set[str] = frozenset(PHASES),
+    checks: list[str] | None = None,
+    cross_file: bool = False,
+    cross_file_syntax: bool = False,
 ) -> bool:
     failed_to_parse = []
     suite = unittest.TestSuite()
-    for filename in db_files:
+    # The files of each directory, for the checks across files
+    projects: dict[str, Project] = {}
+    # With cross_file_syntax, the strict files of each directory are syntax checked together
+    syntax_files = set()
+    for filename, parse in parse_db_files(db_files, jobs, cache_dir):
         try:
-            filename = os.path.abspath(filename)
-            with open(filename) as db_file:
-                parsed_db = Parser(Lexer(db_file.read())).db()
-            suite.addTest(
-                DbCheckerTests(parsed_db, "test_pv_check", filename, verbose, strict_error)
-            )
-            if filename in strict:
+            parsed_db = parse()
+            if "pv" in phases:
+                suite.addTest(
+                    DbCheckerTests(
+                        parsed_db,
+                        "test_pv_check",
+                        filename,
+                        verbose,
+                        strict_error,
+                        stats,
+                        check_cache,
+                        checks,
+                    )
+                )
+            # The syntax check groups the records, so it is left out entirely if not selected
+            if cross_file or cross_file_syntax:
+                projects.setdefault(os.path.dirname(filename), Project()).add_db(
+                    filename, parsed_db
+                )
+            if "syntax" in phases and filename in strict and cross_file_syntax:
+                syntax_files.add(filename)
+            elif "syntax" in phases and filename in strict:
                 suite.addTest(
                     DbCheckerTests(parsed_db, "test_syntax_check", filename, verbose, strict_error)
                 )
@@ -123,6 +296,17 @@ def check_files(
         except IOError:
             print("FILE ERROR: File {} does not exist".format(filename))
 
+    for directory, project in sorted(projects.items()):
+        if cross_file:
+            suite.addTest(
+                ProjectCheckerTests(project, "test_project_check", directory, verbose, strict_error)
+            )
+        if not syntax_files.isdisjoint(project.dbs):
+            suite.addTest(
+                ProjectCheckerTests(
+                    project, "test_syntax_check", directory, verbose, strict_error, syntax_files
+                )
+            )
     success = xmlrunner.XMLTestRunner(output=output_dir).run(suite).wasSuccessful()
     print(f"Test results output to {output_dir}")
     if len(failed_to_parse) > 0:
@@ -161,6 +345,55 @@ if __name__ == "__main__":
         help="Check all db files below the specified directory",
     )
     parser.add_argument("-v", "--verbose", action="store_true", help="Run in verbose mode")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1, help="The number of processes to parse db files with"
+    )
+    # Paths used after checking a directory has changed into it are made absolute when parsed
+    parser.add_argument(
+        "--parse-cache",
+        type=os.path.abspath,
+        default=None,
+        help="A directory to cache the latest parse of each db file in",
+    )
+    parser.add_argument(
+        "--stats",
+        type=os.path.abspath,
+        default=None,
+        help="A file to write the time taken and records visited by each pv check to, as JSON",
+    )
+    parser.add_argument(
+        "--rules",
+        default=None,
+        help="A JSON file of rule tables (units, record types, DESC length) to check against",
+    )
+    parser.add_argument(
+        "--check-cache",
+        type=os.path.abspath,
+        default=None,
+        help="A file to cache the results of the pv checks on each record in between runs",
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        default=None,
+        help="Only run these phases ({}) and/or pv checks ({})".format(
+            ", ".join(PHASES), ", ".join(select_checks())
+        ),
+    )
+    parser.add_argument(
+        "--skip", nargs="+", default=None, help="Do not run these phases and/or pv checks"
+    )
+    parser.add_argument(
+        "--cross-file",
+        action="store_true",
+        help="Check for repeated PV names, alias clashes, unresolved aliases and repeated "
+        "logging tags across the db files in a directory",
+    )
+    parser.add_argument(
+        "--cross-file-syntax",
+        action="store_true",
+        help="Group SP and SP:RBV records with those in other db files in the same directory",
+    )
     parser.add_argument(
         "-s",
         "--strict",
@@ -172,9 +405,35 @@ if __name__ == "__main__":
         parser.print_help()
     else:
         output_dir = args.output
+        try:
+            phases, checks = select_phases(args.only, args.skip)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.rules:
+            try:
+                configure_rules(load_rules(args.rules))
+            except (RulesError, OSError) as e:
+                parser.error("Could not load the rules from {}: {}".format(args.rules, e))
+        stats = CheckStats() if args.stats else None
+        check_cache = None
+        if args.check_cache:
+            check_cache = CheckResultCache()
+            check_cache.load(args.check_cache)
+        options = dict(
+            jobs=args.jobs,
+            cache_dir=args.parse_cache,
+            stats=stats,
+            check_cache=check_cache,
+            phases=phases,
+            checks=checks,
+            cross_file=args.cross_file,
+            cross_file_syntax=args.cross_file_syntax,
+        )
         checks_failed = False
         if len(args.files) > 0:
-            checks_failed = check_files(args.files, args.files, args.verbose, args.strict)
+            checks_failed = check_files(
+                args.files, args.files, args.verbose, args.strict, **options
+            )
         if len(args.directory) > 0:
             if args.recursive:
                 to_check = []
@@ -183,10 +442,17 @@ if __name__ == "__main__":
                 append_reduced_file_list(dir_list, DIRECTORIES_TO_ALWAYS_IGNORE, to_check)
                 append_reduced_file_list(dir_list, DIRECTORIES_TO_IGNORE_STRICT, strict_check)
 
-                checks_failed = check_files(to_check, strict_check, args.verbose, args.strict)
+                checks_failed = check_files(
+                    to_check, strict_check, args.verbose, args.strict, **options
+                )
             else:
                 # Find db files in directory
                 os.chdir(args.directory[0])
                 files = glob.glob("*.db")
-                checks_failed = check_files(files, files, args.verbose, args.strict)
+                checks_failed = check_files(files, files, args.verbose, args.strict, **options)
+        if stats is not None:
+            stats.write(args.stats)
+            print(f"Check statistics output to {args.stats}")
+        if check_cache is not None:
+            check_cache.save(args.check_cache)
         sys.exit(1 if checks_failed else 0)
@@ -1,6 +1,10 @@
+import os
+import tempfile
 import unittest
-from os.path import join
+from os.path import abspath, join
+from unittest import mock
 
+import check_db_file
 from src.db_checker import DbChecker
 from src.db_parser.lexer import Lexer
 from src.db_parser.parser import Parser
@@ -133,3 +137,39 @@ class TestWithDBExamples(unittest.TestCase):
         # Check that the correct number of errors and warnings were found.
         self.assertListEqual(errors, expected_errors)
         self.assertEqual(warnings, expected_warnings)
+
+
+class TestCheckFiles(unittest.TestCase):
+    test_folder = "check_db_file_tests"
+
+    def test_parse_db_files_yields_each_file_once(self):
+        filepath = join(self.test_folder, "isisbeam.db")
+        parsed = check_db_file.parse_db_files(
+            [filepath, abspath(filepath), join(self.test_folder, ".", "isisbeam.db")]
+        )
+        self.assertListEqual([filename for filename, _ in parsed], [abspath(filepath)])
+
+    def test_parse_cache_keeps_latest_parse_of_each_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache_dir = join(directory, "cache")
+            filepath = join(directory, "a.db")
+            other = join(directory, "b.db")
+            for path, contents in ((filepath, 'record(ai, "A") {}'), (other, 'record(ai, "B") {}')):
+                with open(path, "w") as db_file:
+                    db_file.write(contents)
+                check_db_file.parse_db_file(path, cache_dir)
+            with open(filepath, "w") as db_file:
+                db_file.write('record(ai, "C") {}')
+            data = check_db_file.parse_db_file(filepath, cache_dir)
+
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+            self.assertEqual(data, check_db_file.parse_db_file(filepath, cache_dir))
+
+    def test_file_given_twice_with_cross_file(self):
+        filepath = join(self.test_folder, "isisbeam.db")
+        with tempfile.TemporaryDirectory() as output:
+            with mock.patch.object(check_db_file, "output_dir", output):
+                failed = check_db_file.check_files(
+                    [filepath, abspath(filepath)], [], False, cross_file=True
+                )
+        self.assertFalse(failed)
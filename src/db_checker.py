@@ -1,7 +1,10 @@
 import re
 import unittest
 
+from src.db_parser.epics_collections import Record
 from src.grouper import Grouper
+from src.names import analyse_name
+from src.project_checks import run_project_checks
 from src.pv_checks import run_pv_checks
 
 # Rules implemented:
@@ -20,20 +23,23 @@ from src.pv_checks import run_pv_checks
 #        e.g. DUMMYPV_SP_RB
 
 
+# Names should be upper case
+_LOWER_CASE = re.compile("[a-z]")
+# Names (without macros) should only contain a-z A-Z 0-9 _ :
+_ILLEGAL_CHARS = re.compile(r"[^\w:]")
+
+
 def remove_macro(pvname, remove_colon=True):
-    if pvname.find("$") != -1:
-        left = pvname.rfind(")") + 1
-        pvname = pvname[left:]
-        # Remove leading : if there is one
-        if remove_colon and pvname.startswith(":"):
-            pvname = pvname[1:]
-    return pvname
+    # Also removes a leading : after the macro if remove_colon is set
+    return analyse_name(pvname).without_macro(remove_colon)
 
 
 class DbCheckerTests(unittest.TestCase):
-    def __init__(self, db, test_to_run, filename, debug, strict):
+    def __init__(
+        self, db, test_to_run, filename, debug, strict, stats=None, cache=None, checks=None
+    ):
         super(DbCheckerTests, self).__init__(test_to_run)
-        self.dbc = DbChecker(db, filename, strict)
+        self.dbc = DbChecker(db, filename, strict, stats, cache, checks)
 
     def test_pv_check(self):
         warnings, errors = self.dbc.pv_check()
@@ -44,8 +50,22 @@ class DbCheckerTests(unittest.TestCase):
         self.assertListEqual([], errors)
 
 
+class ProjectCheckerTests(unittest.TestCase):
+    def __init__(self, project, test_to_run, name, debug, strict, filenames=None):
+        super(ProjectCheckerTests, self).__init__(test_to_run)
+        self.checker = ProjectChecker(project, name, strict, filenames)
+
+    def test_project_check(self):
+        warnings, errors = self.checker.project_check()
+        self.assertListEqual([], errors)
+
+    def test_syntax_check(self):
+        warnings, errors = self.checker.syntax_check()
+        self.assertListEqual([], errors)
+
+
 class DbChecker:
-    def __init__(self, db, filename, strict=False):
+    def __init__(self, db, filename, strict=False, stats=None, cache=None, checks=None):
         self.filename = filename
         self.errors = []
         self.warnings = []
@@ -54,10 +74,16 @@ class DbChecker:
         self.parsed_db = db
         self.records_dict = {}
         self.strict = strict
+        self.stats = stats
+        self.cache = cache
+        # Names of the pv checks to run, or None for all of them
+        self.checks = checks
 
     def pv_check(self):
         print(f"\n** CHECKING {self.filename}'s PVs **")
-        warnings, errors = run_pv_checks(self.parsed_db)
+        warnings, errors = run_pv_checks(
+            self.parsed_db, self.stats, self.filename, self.cache, self.checks
+        )
         print(f"**  PV ERROR COUNT = {len(errors)} **")
         print(f"**  PV WARNING COUNT = {len(warnings)} **")
         return warnings, errors
@@ -67,15 +93,14 @@ class DbChecker:
         grouper = Grouper()
         # Check for consistency in whether PV macros are followed by colons
         self.check_macro_syntax()
-        record_names = [record.pv for record in self.parsed_db.records]
-        self.records_dict = {
-            name: record for name, record in zip(record_names, self.parsed_db.records)
-        }
+        self.records_dict = self.get_records_dict()
         groups = grouper.group_records(self.records_dict)
+        # Find the names failing the case and character checks, then report them group by group
+        case_errors, char_errors = self.find_name_errors(
+            [name for group in groups.values() for name in group.get_all()]
+        )
         for group_name in groups.keys():
-            [self.check_case(name) for name in groups[group_name].get_all()]
-            [self.check_chars(name) for name in groups[group_name].get_all()]
-            self.check_candidates(groups[group_name])
+            self.check_group(groups[group_name], case_errors, char_errors)
         if self.strict:
             self.errors = self.catch
         else:
@@ -91,13 +116,39 @@ class DbChecker:
 
         return len(self.warnings), self.errors
 
-    def check_macro_syntax(self):
+    def check_group(self, group, case_errors=None, char_errors=None):
+        """
+        This method runs the syntax checks on the names of a single group, e.g. to check
+        only the groups changed by an IncrementalGrouper. The names failing the case and
+        character checks can be found for many groups at once by find_name_errors, otherwise
+        they are found for this group.
+        """
+        if case_errors is None or char_errors is None:
+            case_errors, char_errors = self.find_name_errors(group.get_all())
+        for name in group.get_all():
+            if name in case_errors:
+                self.add_case_error(name)
+        for name in group.get_all():
+            if name in char_errors:
+                self.add_char_error(char_errors[name])
+        self.check_candidates(group)
+
+    def get_records_dict(self):
+        """
+        This method returns a dict of name to record for the records to group
+        """
+        record_names = [record.pv for record in self.parsed_db.records]
+        return {name: record for name, record in zip(record_names, self.parsed_db.records)}
+
+    def check_macro_syntax(self, db=None):
         """
         This method checks for consistency in whether or not a macro
-        is followed by a colon across a db
+        is followed by a colon across a db, by default the db being checked
         """
+        if db is None:
+            db = self.parsed_db
         colon = None
-        for record in self.parsed_db.records:
+        for record in db.records:
             name_without_macro = remove_macro(record.pv, False)
             if colon is None:
                 colon = name_without_macro.startswith(":")
@@ -114,17 +165,37 @@ class DbChecker:
                             + " should not have a colon after the macro"
                         )
 
+    def find_name_errors(self, names):
+        """
+        This method runs the case and character checks over many names
+
+        Returns:
+            tuple of the set of names which are not upper-case, and a dict of names containing
+            illegal characters to the name with its macro removed
+        """
+        case_errors = {name for name in names if _LOWER_CASE.search(name)}
+        char_errors = {}
+        for name in names:
+            stripped = remove_macro(name)
+            if _ILLEGAL_CHARS.search(stripped):
+                char_errors[name] = stripped
+        return case_errors, char_errors
+
     def check_case(self, name):
-        se = re.search("[a-z]", name)
-        if se is not None:
-            self.warnings.append("CASING ERROR: " + name + " should be upper-case")
+        case_errors, _ = self.find_name_errors([name])
+        if name in case_errors:
+            self.add_case_error(name)
+
+    def add_case_error(self, name):
+        self.warnings.append("CASING ERROR: " + name + " should be upper-case")
 
     def check_chars(self, name):
-        name = remove_macro(name)
-        # Only contains a-z A-Z 0-9 _ :
-        se = re.search(r"[^\w:]", name)
-        if se is not None:
-            self.catch.append("CHARACTER ERROR: " + name + " contains illegal characters")
+        _, char_errors = self.find_name_errors([name])
+        if name in char_errors:
+            self.add_char_error(char_errors[name])
+
+    def add_char_error(self, name):
+        self.catch.append("CHARACTER ERROR: " + name + " contains illegal characters")
 
     def check_candidates(self, group):
         if group.main == group.SP:
@@ -154,7 +225,8 @@ class DbChecker:
 
     def sp_main_checks(self, group):
         # It is a SP, so it should have a readback alias (rule 6)
-        combined_aliases = self.records_dict[group.main].aliases
+        # Copy so that the record's own alias list is not modified
+        combined_aliases = list(self.records_dict[group.main].aliases)
         if group.SP_RBV is not None and group.SP_RBV in self.records_dict:
             combined_aliases += self.records_dict[group.SP_RBV].aliases
         if group.RB == "":
@@ -172,3 +244,65 @@ class DbChecker:
             self.catch.append(
                 "FORMAT ERROR: " + group.main + " does not have a correctly formatted " + end
             )
+
+
+class ProjectChecker(DbChecker):
+    """
+    This class runs the checks which need every db of a Project at once. The syntax checks
+    are run over the dbs of the given files (by default all of them) together, so that names
+    are grouped with SP and SP:RBV records and aliases from other files.
+    """
+
+    def __init__(self, project, name, strict=False, filenames=None):
+        super(ProjectChecker, self).__init__(None, name, strict)
+        self.project = project
+        self.filenames = filenames
+
+    def get_files(self):
+        """
+        This method returns the (filename, db) pairs whose names are syntax checked
+        """
+        return [
+            (filename, db)
+            for filename, db in self.project.dbs.items()
+            if self.filenames is None or filename in self.filenames
+        ]
+
+    def get_dbs(self):
+        """
+        This method returns the dbs whose names are syntax checked
+        """
+        return [db for _, db in self.get_files()]
+
+    def project_check(self):
+        print(f"\n** CHECKING {self.filename}'s PVs across files **")
+        warnings, errors = run_project_checks(self.project)
+        print(f"**  PROJECT ERROR COUNT = {len(errors)} **")
+        print(f"**  PROJECT WARNING COUNT = {len(warnings)} **")
+        return warnings, errors
+
+    def get_records_dict(self):
+        """
+        This method returns a dict of name to record for every record in the checked dbs.
+        Where a name is used in more than one file, the record from the first file is used.
+        Records given aliases by other files are copied, so that the aliases can be added
+        without changing the records checked for each file.
+        """
+        records = {}
+        for filename, db in self.get_files():
+            for record in db.records:
+                if record.pv in records:
+                    continue
+                aliases = self.project.get_aliases(filename, record)
+                if len(aliases) != len(record.aliases):
+                    record = Record(record.type, record.pv, record.infos, record.fields, aliases)
+                records[record.pv] = record
+        return records
+
+    def check_macro_syntax(self, db=None):
+        # Macros only need to be used consistently within each db
+        if db is not None:
+            super(ProjectChecker, self).check_macro_syntax(db)
+            return
+        for project_db in self.get_dbs():
+            super(ProjectChecker, self).check_macro_syntax(project_db)
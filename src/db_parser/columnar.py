@@ -0,0 +1,147 @@
+"""
+This file holds a columnar (struct of arrays) representation of a db, used as the transport
+format for passing parsed dbs between processes and to the parse cache (see serialisation).
+The checks run on the Record objects rebuilt from it, not on the columns themselves.
+
+Every string (record types, names, field/info names and values, aliases) is stored once in a
+string table, and records refer to them by integer code. Fields, infos and aliases of all
+records are flattened into single arrays, with per-record offsets marking where each record's
+entries start and end.
+"""
+
+from array import array
+
+from src.db_parser.epics_collections import EMPTY_LIST, Db, Field, Record
+
+
+class StringTable:
+    """
+    This class maps strings to integer codes and back
+    """
+
+    __slots__ = ("strings", "_codes")
+
+    def __init__(self, strings=()):
+        self.strings = list(strings)
+        self._codes = {string: code for code, string in enumerate(self.strings)}
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __getitem__(self, code):
+        return self.strings[code]
+
+    def code(self, string):
+        """
+        This method returns the code for the given string, adding it to the table if necessary
+        """
+        code = self._codes.get(string)
+        if code is None:
+            code = len(self.strings)
+            self._codes[string] = code
+            self.strings.append(string)
+        return code
+
+
+class ColumnarDb:
+    """
+    This class holds all the data in a single db as a struct of arrays
+    """
+
+    def __init__(self, directory=""):
+        self.directory = directory
+        self.strings = StringTable()
+        self.record_types = array("I")
+        self.record_names = array("I")
+        self.field_offsets = array("I", [0])
+        self.field_names = array("I")
+        self.field_values = array("I")
+        self.field_macros = array("B")
+        self.info_offsets = array("I", [0])
+        self.info_names = array("I")
+        self.info_values = array("I")
+        self.alias_offsets = array("I", [0])
+        self.alias_names = array("I")
+        # Flattened (pv, alias) pairs of the db's unresolved DB-level aliases
+        self.unresolved_aliases = array("I")
+
+    @classmethod
+    def from_db(cls, db):
+        """
+        This method builds a columnar db from an existing Db
+        """
+        columnar = cls(db.directory)
+        for rec in db.records:
+            columnar.append_record(rec)
+        for pv, alias in db.unresolved_aliases:
+            columnar.unresolved_aliases.extend(
+                (columnar.strings.code(pv), columnar.strings.code(alias))
+            )
+        return columnar
+
+    def __len__(self):
+        return len(self.record_names)
+
+    def __str__(self):
+        return str(self.directory)
+
+    def append_record(self, rec):
+        """
+        This method appends a Record to the end of the columns
+        """
+        code = self.strings.code
+        self.record_types.append(code(rec.type))
+        self.record_names.append(code(rec.pv))
+        for field in rec.fields:
+            self.field_names.append(code(field.name))
+            self.field_values.append(code(field.value))
+            self.field_macros.append(field.has_macro)
+        self.field_offsets.append(len(self.field_names))
+        for info in rec.infos:
+            self.info_names.append(code(info.name))
+            self.info_values.append(code(info.value))
+        self.info_offsets.append(len(self.info_names))
+        for alias in rec.aliases:
+            self.alias_names.append(code(alias))
+        self.alias_offsets.append(len(self.alias_names))
+
+    def record(self, index):
+        """
+        This method builds the Record object at the given index
+        """
+        strings = self.strings.strings
+        start, end = self.field_offsets[index], self.field_offsets[index + 1]
+        fields = [
+            Field(strings[name], strings[value], bool(macro))
+            for name, value, macro in zip(
+                self.field_names[start:end],
+                self.field_values[start:end],
+                self.field_macros[start:end],
+            )
+        ]
+        start, end = self.info_offsets[index], self.info_offsets[index + 1]
+        infos = [
+            Field(strings[name], strings[value])
+            for name, value in zip(self.info_names[start:end], self.info_values[start:end])
+        ]
+        start, end = self.alias_offsets[index], self.alias_offsets[index + 1]
+        aliases = [strings[alias] for alias in self.alias_names[start:end]]
+        return Record(
+            strings[self.record_types[index]],
+            strings[self.record_names[index]],
+            infos or EMPTY_LIST,
+            fields or EMPTY_LIST,
+            aliases or EMPTY_LIST,
+        )
+
+    def to_db(self):
+        """
+        This method builds a Db holding a Record object for every record
+        """
+        db = Db(self.directory, [self.record(index) for index in range(len(self))])
+        strings = self.strings.strings
+        pairs = self.unresolved_aliases
+        db.unresolved_aliases = [
+            (strings[pv], strings[alias]) for pv, alias in zip(pairs[::2], pairs[1::2])
+        ]
+        return db
@@ -2,3 +2,9 @@ class DbSyntaxError(ValueError):
     """
     Error that gets raised if there was a problem with the syntax of a DB file.
     """
+
+
+class SerialisationError(ValueError):
+    """
+    Error that gets raised if a serialised db could not be loaded.
+    """
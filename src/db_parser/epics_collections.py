@@ -2,7 +2,58 @@
 This file holds the classes to hold the record and field data
 """
 
+import hashlib
 import re
+import sys
+
+from src.db_parser.field_types import (
+    FIELD_TYPES,
+    FieldDiagnostic,
+    convert_field_value,
+    get_field_type,
+)
+
+
+class _EmptyList(list):
+    """
+    An empty list which cannot be modified. A single instance is shared by every parsed record
+    that has no fields, infos or aliases, rather than each record holding its own empty list.
+    """
+
+    __slots__ = ()
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("The shared empty list cannot be modified")
+
+    append = extend = insert = remove = pop = clear = sort = reverse = _immutable
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+
+    def __reduce__(self):
+        # Unpickle back to the shared instance
+        return "EMPTY_LIST"
+
+
+EMPTY_LIST = _EmptyList()
+
+
+def _hash_parts(*sections):
+    """
+    This method returns a 128 bit hex digest of one or more sequences of values. Each section
+    is prefixed with its number of values and each value with its length, so that different
+    sections cannot produce the same input to the hash.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for section in sections:
+        digest.update(b"%d;" % len(section))
+        for part in section:
+            encoded = str(part).encode("utf-8")
+            digest.update(b"%d:" % len(encoded))
+            digest.update(encoded)
+    return digest.hexdigest()
+
+
+# Matches PV names which are simulation records
+_SIM_PATTERN = re.compile(r".SIM(:.|$)")
 
 
 class Db:
@@ -13,6 +64,12 @@ class Db:
     def __init__(self, directory, records):
         self.directory = directory
         self.records = records
+        # (pv, alias) pairs for DB-level aliases of records which are not in this db
+        self.unresolved_aliases = []
+        self._indexes = None
+        self._indexed_records = None
+        self._indexed_count = 0
+        self._fingerprint = None
 
     def __len__(self):
         return len(self.records)
@@ -20,35 +77,315 @@ class Db:
     def __str__(self):
         return str(self.directory)
 
+    def get_fingerprint(self):
+        """
+        This method returns a hash of the fingerprints of all records, in order, and of the
+        unresolved aliases. It is cached until records are added or the records list is
+        replaced; modifying an existing record requires invalidate_indexes.
+        """
+        fingerprint = self._fingerprint
+        if (
+            fingerprint is None
+            or fingerprint[0] is not self.records
+            or fingerprint[1] != len(self.records)
+        ):
+            fingerprint = (
+                self.records,
+                len(self.records),
+                _hash_parts(
+                    [rec.get_fingerprint() for rec in self.records],
+                    [part for pair in self.unresolved_aliases for part in pair],
+                ),
+            )
+            self._fingerprint = fingerprint
+        return fingerprint[2]
+
+    def same_content(self, other):
+        """
+        This method returns whether the two dbs have the same content, using their
+        fingerprints
+        """
+        return self.get_fingerprint() == other.get_fingerprint()
+
+    def invalidate_indexes(self):
+        """
+        This method discards the cached indexes and fingerprint. They are rebuilt automatically
+        if records are added or the records list is replaced, but must be invalidated by hand
+        (along with Record.invalidate_caches) if an existing record is modified.
+        """
+        self._indexes = None
+        self._fingerprint = None
+
+    def _get_indexes(self):
+        """
+        This method returns the indexes by record type, info name and field name, building
+        them if necessary. Each index maps a key to the positions of the matching records.
+        """
+        if (
+            self._indexes is None
+            or self._indexed_records is not self.records
+            or self._indexed_count != len(self.records)
+        ):
+            by_type, by_info, by_field = {}, {}, {}
+            for position, rec in enumerate(self.records):
+                by_type.setdefault(rec.type, []).append(position)
+                for name in {info.name for info in rec.infos}:
+                    by_info.setdefault(name, []).append(position)
+                for name in {field.name for field in rec.fields}:
+                    by_field.setdefault(name, []).append(position)
+            self._indexes = by_type, by_info, by_field
+            self._indexed_records = self.records
+            self._indexed_count = len(self.records)
+        return self._indexes
+
+    def _lookup(self, index, keys):
+        """
+        This method returns the records found under any of the given keys, in db order
+        """
+        position_lists = [index[key] for key in keys if key in index]
+        if len(position_lists) == 1:
+            positions = position_lists[0]
+        else:
+            positions = sorted(set().union(*position_lists))
+        return [self.records[position] for position in positions]
+
+    def get_record_positions(self, rec_types=None, info_names=None, field_names=None):
+        """
+        This method returns the positions in records of the records matching every given
+        condition, in db order. A condition of None matches every record.
+
+        Args:
+            rec_types: collection of types, one of which the record must be
+            info_names: collection of info names, one of which the record must have
+            field_names: collection of field names, one of which the record must have
+        Returns:
+            sorted list of positions
+        """
+        by_type, by_info, by_field = self._get_indexes()
+        positions = None
+        for index, keys in ((by_type, rec_types), (by_info, info_names), (by_field, field_names)):
+            if keys is None:
+                continue
+            found = set()
+            for key in keys:
+                found.update(index.get(key, ()))
+            positions = found if positions is None else positions & found
+        if positions is None:
+            return list(range(len(self.records)))
+        return sorted(positions)
+
+    def get_records_of_type(self, rec_types):
+        """
+        This method returns the records whose type is in the given collection
+        """
+        return self._lookup(self._get_indexes()[0], rec_types)
+
+    def get_records_with_info(self, info_names):
+        """
+        This method returns the records with an info whose name is in the given collection
+        """
+        return self._lookup(self._get_indexes()[1], info_names)
+
+    def get_records_with_field(self, field_names):
+        """
+        This method returns the records with a field whose name is in the given collection
+        """
+        return self._lookup(self._get_indexes()[2], field_names)
+
+    def get_info_names(self):
+        """
+        This method returns the names of all infos used in the db
+        """
+        return list(self._get_indexes()[1])
+
+
+class Project:
+    """
+    This class holds the dbs parsed from many files, with a global index from every PV name
+    and alias to the files and records defining it. It should hold dbs which are loaded
+    together (e.g. by one IOC), as PV names are only unique within that scope.
+    """
+
+    def __init__(self):
+        self.dbs = {}
+        self.pv_index = {}
+        self.alias_index = {}
+        # Maps a PV name to the (filename, alias) pairs waiting for a record with that name
+        self._pending_aliases = {}
+        # Maps (filename, PV name) to the aliases given to that record by other files
+        self._attached_aliases = {}
+
+    def __len__(self):
+        return len(self.dbs)
+
+    def add_db(self, filename, db):
+        """
+        This method adds a parsed db to the project and indexes its records and aliases.
+        DB-level aliases which the db could not resolve itself are attached to the record
+        from another file once that record has been added. They are only held by the project
+        (see get_aliases), so the records and dbs are unchanged for the checks of each file.
+
+        Raises:
+            ValueError: if a db has already been added for the filename
+        """
+        if filename in self.dbs:
+            raise ValueError("{} has already been added to the project".format(filename))
+        self.dbs[filename] = db
+        for rec in db.records:
+            self._add_name(self.pv_index, rec.pv, filename, rec)
+            for alias in rec.aliases:
+                self._add_name(self.alias_index, alias, filename, rec)
+
+        for pv, alias in db.unresolved_aliases:
+            defined = self.find(pv)
+            if defined:
+                self._attach_alias(alias, *defined[0])
+            else:
+                self._pending_aliases.setdefault(pv, []).append((filename, alias))
+
+    def _add_name(self, index, name, filename, rec):
+        index.setdefault(name, []).append((filename, rec))
+        for _, alias in self._pending_aliases.pop(name, []):
+            self._attach_alias(alias, filename, rec)
+
+    def _attach_alias(self, alias, filename, rec):
+        self._attached_aliases.setdefault((filename, rec.pv), []).append(alias)
+        self._add_name(self.alias_index, alias, filename, rec)
+
+    def find(self, name):
+        """
+        This method returns a list of (filename, record) for every record which has the given
+        name as its PV name or as an alias
+        """
+        return self.pv_index.get(name, []) + self.alias_index.get(name, [])
+
+    def get_aliases(self, filename, rec):
+        """
+        This method returns the aliases of a record of the given file, including those given
+        to it by DB-level aliases in other files of the project
+        """
+        return rec.aliases + self._attached_aliases.get((filename, rec.pv), [])
+
+    def get_unresolved_aliases(self):
+        """
+        This method returns a list of (filename, pv, alias) for the DB-level aliases whose
+        record has not been found in any db of the project
+        """
+        return [
+            (filename, pv, alias)
+            for pv, pending in self._pending_aliases.items()
+            for filename, alias in pending
+        ]
+
 
 class Record:
     """
     This class holds all the data about each record, including a list of
     fields within the record, and allows the constituent fields to be
     interrogated.
+    Record types are interned, as a tree only holds a handful of distinct types.
     """
 
+    __slots__ = (
+        "type",
+        "pv",
+        "fields",
+        "infos",
+        "aliases",
+        "_simulation",
+        "_disable",
+        "_typed_values",
+        "_fingerprint",
+    )
+
     def __init__(self, rec_type, pv, infos, fields, aliases):
-        self.type = rec_type
+        self.type = sys.intern(rec_type)
         self.pv = pv
         self.fields = fields
         self.infos = infos
         self.aliases = aliases
-        # Test for whether the PV is a simulation
-        self.simulation = re.search(r".SIM(:.|$)", pv) is not None
-
-        # Test for whether the PV is a disable
-        self.disable = re.search(r"DISABLE", pv) is not None
+        # Whether the PV is a simulation/disable is only worked out when first asked for
+        self._simulation = None
+        self._disable = None
+        # Maps field name to (converted value, diagnostic), filled in as fields are converted
+        self._typed_values = None
+        self._fingerprint = None
 
     def is_sim(self):
-        return self.simulation
+        if self._simulation is None:
+            self._simulation = _SIM_PATTERN.search(self.pv) is not None
+        return self._simulation
 
     def is_disable(self):
-        return self.disable
+        if self._disable is None:
+            self._disable = "DISABLE" in self.pv
+        return self._disable
+
+    @property
+    def simulation(self):
+        return self.is_sim()
+
+    @property
+    def disable(self):
+        return self.is_disable()
 
     def __str__(self):
         return str(self.pv)
 
+    def add_alias(self, alias):
+        """
+        This method adds an alias to the record, replacing the shared empty
+        alias list if necessary
+        """
+        if self.aliases is EMPTY_LIST:
+            self.aliases = []
+        self.aliases.append(alias)
+        self._fingerprint = None
+
+    def invalidate_caches(self):
+        """
+        This method discards the cached fingerprint and typed field values. It must be called
+        if the record's fields, infos or aliases are modified other than through add_alias.
+        """
+        self._typed_values = None
+        self._fingerprint = None
+
+    def get_fingerprint(self):
+        """
+        This method returns a hash of the record's type, name, fields, infos and aliases.
+        Field, info and alias order is ignored. The fingerprint is computed once and cached.
+        """
+        if self._fingerprint is None:
+            fields = sorted((f.name, str(f.value), f.has_macro) for f in self.fields)
+            infos = sorted((i.name, str(i.value)) for i in self.infos)
+            self._fingerprint = _hash_parts(
+                [self.type, self.pv],
+                [part for field in fields for part in field],
+                [part for info in infos for part in info],
+                sorted(self.aliases),
+            )
+        return self._fingerprint
+
+    def same_content(self, other):
+        """
+        This method returns whether the two records have the same content, using their
+        fingerprints
+        """
+        return self.get_fingerprint() == other.get_fingerprint()
+
+    def get_ordered_fingerprint(self):
+        """
+        This method returns a hash of the record's type, name, fields, infos and aliases which,
+        unlike get_fingerprint, depends on the order of the fields, infos and aliases. It is
+        not cached.
+        """
+        return _hash_parts(
+            [self.type, self.pv],
+            [part for f in self.fields for part in (f.name, f.value, f.has_macro)],
+            [part for i in self.infos for part in (i.name, i.value)],
+            self.aliases,
+        )
+
     def get_field_names(self):
         """
         This method returns all field names as a list
@@ -90,6 +427,47 @@ class Record:
                 return field
         return None
 
+    def get_typed_field_value(self, search):
+        """
+        This method returns the value of the first field that matches the search input,
+        converted according to the field's EPICS type. The conversion is cached.
+        None is returned if no field exists, its value contains macros or it could not be
+        converted (see get_field_diagnostics). Fields with no known type are not converted.
+        """
+        return self._convert_field(search)[0]
+
+    def get_field_diagnostics(self):
+        """
+        This method converts all fields with a known EPICS type, and returns a list of
+        FieldDiagnostic for those whose values could not be converted
+        """
+        diagnostics = []
+        for name in dict.fromkeys(self.get_field_names()):
+            if name in FIELD_TYPES:
+                diagnostic = self._convert_field(name)[1]
+                if diagnostic is not None:
+                    diagnostics.append(diagnostic)
+        return diagnostics
+
+    def _convert_field(self, search):
+        if self._typed_values is None:
+            self._typed_values = {}
+        converted = self._typed_values.get(search)
+        if converted is None:
+            value = self.get_field_value(search)
+            if value is None:
+                converted = (None, None)
+            else:
+                typed_value, reason = convert_field_value(search, value, self.type)
+                diagnostic = None
+                if reason is not None:
+                    diagnostic = FieldDiagnostic(
+                        self.pv, search, value, get_field_type(search, self.type), reason
+                    )
+                converted = (typed_value, diagnostic)
+            self._typed_values[search] = converted
+        return converted
+
     def get_type(self):
         """
         This method returns the PV type
@@ -146,14 +524,53 @@ class Record:
 class Field:
     """
     This class holds all the data about each field within a record,
-    not using a dictionary as may not be unique
+    not using a dictionary as may not be unique.
+    Names are interned so that every "DESC", "EGU" etc. in a tree is the same string object.
+    A field may instead refer to its value's position in the source it was parsed from, in
+    which case the value string is only built when it is first read.
     """
 
+    # _value holds the value, or the source text while _start is not None
+    __slots__ = ("name", "_value", "_start", "_end", "has_macro")
+
     def __init__(self, name, value, has_macro=False):
-        self.name = name.strip()
-        self.value = value
+        self.name = sys.intern(name.strip())
+        self._value = value
+        self._start = None
+        self._end = None
         self.has_macro = has_macro
 
+    @classmethod
+    def from_source(cls, name, source, start, end, has_macro=False):
+        """
+        This method creates a field whose value is source[start:end]
+        """
+        field = cls(name, source, has_macro)
+        field._start = start
+        field._end = end
+        return field
+
+    @property
+    def value(self):
+        if self._start is not None:
+            self._value = self._value[self._start : self._end]
+            self._start = None
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+        self._start = None
+
+    def value_length(self):
+        """
+        This method returns the length of the value, without building it if it has not been
+        read yet
+        """
+        if self._start is not None:
+            return self._end - self._start
+        return len(self._value)
+
     def __str__(self):
         return str(self.name) + ":" + str(self.value)
 
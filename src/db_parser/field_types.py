@@ -0,0 +1,139 @@
+"""
+This file holds the EPICS types of common record fields, and converts raw field values to them
+"""
+
+# Choices of the menus used by common fields, in menu index order
+MENU_CHOICES = {
+    "SCAN": [
+        "Passive",
+        "Event",
+        "I/O Intr",
+        "10 second",
+        "5 second",
+        "2 second",
+        "1 second",
+        ".5 second",
+        ".2 second",
+        ".1 second",
+    ],
+    "PINI": ["NO", "YES", "RUN", "RUNNING", "PAUSE", "PAUSED"],
+    "PRIO": ["LOW", "MEDIUM", "HIGH"],
+}
+
+# The type of fields whose type is the same for every record type that has them
+FIELD_TYPES = {
+    "SCAN": "DBF_MENU",
+    "PINI": "DBF_MENU",
+    "PRIO": "DBF_MENU",
+    "NELM": "DBF_ULONG",
+    "PREC": "DBF_SHORT",
+    "PHAS": "DBF_SHORT",
+    "DISV": "DBF_SHORT",
+    "TSE": "DBF_SHORT",
+    "HOPR": "DBF_DOUBLE",
+    "LOPR": "DBF_DOUBLE",
+    "DRVH": "DBF_DOUBLE",
+    "DRVL": "DBF_DOUBLE",
+    "HIHI": "DBF_DOUBLE",
+    "HIGH": "DBF_DOUBLE",
+    "LOW": "DBF_DOUBLE",
+    "LOLO": "DBF_DOUBLE",
+    "HYST": "DBF_DOUBLE",
+    "ADEL": "DBF_DOUBLE",
+    "MDEL": "DBF_DOUBLE",
+}
+
+# The limit and deadband fields, which are integers on the integer records
+_LIMIT_FIELDS = ("HOPR", "LOPR", "HIHI", "HIGH", "LOW", "LOLO", "HYST", "ADEL", "MDEL")
+_DRIVE_LIMIT_FIELDS = ("DRVH", "DRVL")
+
+# The type of fields on record types where it differs from FIELD_TYPES, by (record type, field)
+RECORD_FIELD_TYPES = {
+    **{("longin", name): "DBF_LONG" for name in _LIMIT_FIELDS},
+    **{("longout", name): "DBF_LONG" for name in _LIMIT_FIELDS + _DRIVE_LIMIT_FIELDS},
+    **{("int64in", name): "DBF_INT64" for name in _LIMIT_FIELDS},
+    **{("int64out", name): "DBF_INT64" for name in _LIMIT_FIELDS + _DRIVE_LIMIT_FIELDS},
+}
+
+# Ranges of the integer field types
+INTEGER_RANGES = {
+    "DBF_SHORT": (-(2**15), 2**15 - 1),
+    "DBF_LONG": (-(2**31), 2**31 - 1),
+    "DBF_ULONG": (0, 2**32 - 1),
+    "DBF_INT64": (-(2**63), 2**63 - 1),
+}
+
+
+class FieldDiagnostic:
+    """
+    This class describes a field value which could not be converted to the field's type
+    """
+
+    __slots__ = ("record", "field", "value", "field_type", "reason")
+
+    def __init__(self, record, field, value, field_type, reason):
+        self.record = record
+        self.field = field
+        self.value = value
+        self.field_type = field_type
+        self.reason = reason
+
+    def __str__(self):
+        return "Invalid {} value '{}' for {} on {}: {}".format(
+            self.field_type, self.value, self.field, self.record, self.reason
+        )
+
+
+def parse_integer(value):
+    value = value.strip()
+    if value[:2].lower() == "0x":
+        return int(value, 16)
+    return int(value)
+
+
+def get_field_type(name, rec_type=None):
+    """
+    This method returns the EPICS type of a field on the given record type, or None if it is
+    not known
+    """
+    return RECORD_FIELD_TYPES.get((rec_type, name)) or FIELD_TYPES.get(name)
+
+
+def convert_field_value(name, value, rec_type=None):
+    """
+    This method converts a raw field value according to the field's type.
+
+    Args:
+        name: the field name
+        value: the raw field value
+        rec_type: the type of the record the field is on, for fields whose type depends on it
+    Returns:
+        tuple of (converted value, reason). The converted value is None if the value could not
+        be converted, and the reason then says why. Values of fields with no known type are
+        returned unchanged, and values containing macros cannot be converted but are not
+        reported as invalid.
+    """
+    field_type = get_field_type(name, rec_type)
+    if field_type is None:
+        return value, None
+    if "$(" in value or "${" in value:
+        return None, None
+    try:
+        if field_type == "DBF_MENU":
+            choices = MENU_CHOICES[name]
+            if value in choices:
+                return value, None
+            # Menus can also be set by index
+            index = parse_integer(value)
+            if not 0 <= index < len(choices):
+                return None, "menu index out of range"
+            return choices[index], None
+        if field_type == "DBF_DOUBLE":
+            return float(value), None
+        converted = parse_integer(value)
+        minimum, maximum = INTEGER_RANGES[field_type]
+        if not minimum <= converted <= maximum:
+            return None, "out of range"
+        return converted, None
+    except ValueError:
+        return None, "not a valid value"
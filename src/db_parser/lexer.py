@@ -13,14 +13,16 @@ class Token(object):
         linenum: the line number this token was found on
         colnum: the column number this token was found on
         contents: the original text that this token was parsed from
+        offset: the position of this token from the start of the lexed input
     """
 
-    def __init__(self, type, linenum, colnum, contents=None):
+    def __init__(self, type, linenum, colnum, contents=None, offset=None):
         self.type = type
         self.contents = contents
 
         self.line = linenum
         self.col = colnum
+        self.offset = offset
 
     def __str__(self):
         return "{} (contents={})".format(self.type, self.contents)
@@ -112,13 +114,20 @@ class Lexer:
             Tokens corresponding to the lexed input.
         """
         lines = self.file_contents.split("\n")
+        line_start = 0
         for linenum, line in enumerate(lines, 1):
             column = 0
             while column < len(line):
                 for regexp in Lexer.TOKEN_MAPPING:
                     match_text = self._text_matches_regex(line[column:], regexp)
                     if match_text is not None:
-                        yield Token(Lexer.TOKEN_MAPPING[regexp], linenum, column, match_text)
+                        yield Token(
+                            Lexer.TOKEN_MAPPING[regexp],
+                            linenum,
+                            column,
+                            match_text,
+                            line_start + column,
+                        )
                         column += len(match_text)
                         break
                 else:
@@ -127,6 +136,7 @@ class Lexer:
                             linenum, column, line
                         )
                     )
+            line_start += len(line) + 1
 
         yield Token(TokenTypes.EOF, len(lines), len(lines[len(lines) - 1]))
 
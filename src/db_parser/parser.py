@@ -1,17 +1,24 @@
 from contextlib import contextmanager
 
 from src.db_parser.common import DbSyntaxError
-from src.db_parser.epics_collections import Db, Field, Record
+from src.db_parser.epics_collections import EMPTY_LIST, Db, Field, Record
 from src.db_parser.tokens import TokenTypes
 
+# Increase when a change to the parser changes the dbs it builds, so cached parses are not reused
+VERSION = 1
+
 
 class Parser(object):
     """
     Main db_parser. Takes input tokens from the given lexer and builds an EPICS DB out of them.
+    If lazy_values is set, quoted field and info values refer to their position in the lexer's
+    input, and their strings are only built when they are read. This is only for library use:
+    check_db_file does not set it, as serialised dbs need every value as a string.
     """
 
-    def __init__(self, lexer):
+    def __init__(self, lexer, lazy_values=False):
         self.lexer = lexer
+        self.lazy_values = lazy_values
         self.current_token = None
         self.next_token()
 
@@ -131,6 +138,8 @@ class Parser(object):
             tuple of (key, value)
         """
         self.consume(TokenTypes.FIELD)
+        if self.lazy_values:
+            return self.source_field(has_macro)
         return Field(*self.key_value_pair(), has_macro=has_macro)
 
     def info(self):
@@ -142,8 +151,28 @@ class Parser(object):
             tuple of (key, value)
         """
         self.consume(TokenTypes.INFO)
+        if self.lazy_values:
+            return self.source_field()
         return Field(*self.key_value_pair())
 
+    def source_field(self, has_macro=False):
+        """
+        Handler for the key value pair of a field or info, where a quoted value is kept as a
+        reference to its position in the lexer's input rather than copied out.
+        Returns:
+            Field
+        """
+        with self.bracket_delimited_block():
+            key = self.value()
+            self.consume(TokenTypes.COMMA)
+            token = self.current_token
+            if token.type != TokenTypes.QUOTED_STRING or token.offset is None:
+                return Field(key, self.value(), has_macro=has_macro)
+            self.consume(TokenTypes.QUOTED_STRING)
+            # Strip quotes
+            start, end = token.offset + 1, token.offset + len(token.contents) - 1
+            return Field.from_source(key, self.lexer.file_contents, start, end, has_macro)
+
     def alias_field(self):
         """
         Handler for an EPICS alias within a DB record
@@ -233,7 +262,7 @@ class Parser(object):
 
         # Special case for records with no body
         if self.current_token.type != TokenTypes.L_BRACE:
-            return Record(record_type, record_name, [], [], [])
+            return Record(record_type, record_name, EMPTY_LIST, EMPTY_LIST, EMPTY_LIST)
         with self.brace_delimited_block():
             while self.current_token.type != TokenTypes.R_BRACE:
                 if self.next_token_is_macro():
@@ -252,7 +281,14 @@ class Parser(object):
                     self.raise_error("Expected info, field or alias")
                 previous_token_macro = False
 
-        return Record(record_type, record_name, infos, fields, aliases)
+        # Records without infos/aliases (the majority) share a single empty list
+        return Record(
+            record_type,
+            record_name,
+            infos or EMPTY_LIST,
+            fields or EMPTY_LIST,
+            aliases or EMPTY_LIST,
+        )
 
     def alias(self):
         """
@@ -289,11 +325,13 @@ class Parser(object):
                 pv, alias = self.alias()
                 # Find the record that this alias belongs to, and add the alias to it.
                 # Don't error if we can't find the record that it belongs to,
-                # it might be in another DB
+                # it might be in another DB, so keep it for resolving across a Project
                 for rec in records.records:
                     if pv == rec.pv or pv in rec.aliases:
-                        rec.aliases.append(alias)
+                        rec.add_alias(alias)
                         break
+                else:
+                    records.unresolved_aliases.append((pv, alias))
             elif self.next_token_is_macro():
                 self.macro()
             else:
@@ -0,0 +1,158 @@
+"""
+This file holds a compact binary format for parsed dbs, used to pass them between processes
+and to cache them on disk.
+
+A serialised db is a string table followed by the integer columns of a ColumnarDb, so loading
+one does not construct any Record or Field objects until the records are accessed.
+
+Layout (all integers little-endian):
+    magic               4 bytes
+    directory           uint32 byte length, then UTF-8 bytes
+    string offsets      array section, byte offsets of each string in the string data
+    string data         uint32 byte length, then the UTF-8 bytes of every string
+    columns             one array section per column, in the order of COLUMNS
+
+Each array section is a one byte typecode, a uint32 item count and then the items.
+"""
+
+import struct
+import sys
+from array import array
+
+from src.db_parser.columnar import ColumnarDb, StringTable
+from src.db_parser.common import SerialisationError
+
+MAGIC = b"DBC\x01"
+
+COLUMNS = (
+    "record_types",
+    "record_names",
+    "field_offsets",
+    "field_names",
+    "field_values",
+    "field_macros",
+    "info_offsets",
+    "info_names",
+    "info_values",
+    "alias_offsets",
+    "alias_names",
+    "unresolved_aliases",
+)
+
+_LENGTH = struct.Struct("<I")
+_ARRAY_HEADER = struct.Struct("<cI")
+
+
+def _pack_bytes(data):
+    return _LENGTH.pack(len(data)) + data
+
+
+def _pack_array(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return _ARRAY_HEADER.pack(values.typecode.encode("ascii"), len(values)) + values.tobytes()
+
+
+def dumps(db):
+    """
+    This method serialises a Db (or ColumnarDb) to bytes. Field and info values must be
+    strings, as they are when parsed from a file.
+
+    Args:
+        db: the db to serialise
+    Returns:
+        The serialised db
+    """
+    columnar = db if isinstance(db, ColumnarDb) else ColumnarDb.from_db(db)
+    encoded = [string.encode("utf-8") for string in columnar.strings.strings]
+    offsets = array("I", [0])
+    for string in encoded:
+        offsets.append(offsets[-1] + len(string))
+
+    parts = [
+        MAGIC,
+        _pack_bytes(str(columnar.directory).encode("utf-8")),
+        _pack_array(offsets),
+        _pack_bytes(b"".join(encoded)),
+    ]
+    parts.extend(_pack_array(getattr(columnar, column)) for column in COLUMNS)
+    return b"".join(parts)
+
+
+class _Reader:
+    """
+    Reads the sections of serialised data in order
+    """
+
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.position = 0
+
+    def take(self, size):
+        end = self.position + size
+        if end > len(self.data):
+            raise SerialisationError("Serialised db is truncated")
+        chunk = self.data[self.position : end]
+        self.position = end
+        return chunk
+
+    def read_bytes(self):
+        (size,) = _LENGTH.unpack(self.take(_LENGTH.size))
+        return self.take(size)
+
+    def read_array(self):
+        typecode, count = _ARRAY_HEADER.unpack(self.take(_ARRAY_HEADER.size))
+        values = array(typecode.decode("ascii"))
+        values.frombytes(self.take(count * values.itemsize))
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+
+
+def loads(data):
+    """
+    This method loads a db serialised by dumps. Records are only built when they are
+    accessed, using ColumnarDb.record or ColumnarDb.to_db.
+
+    Args:
+        data: the serialised db
+    Returns:
+        A ColumnarDb
+    Raises:
+        SerialisationError: if the data is not a complete serialised db
+    """
+    if bytes(data[: len(MAGIC)]) != MAGIC:
+        raise SerialisationError("Data is not a serialised db")
+    reader = _Reader(data)
+    reader.take(len(MAGIC))
+
+    try:
+        columnar = ColumnarDb(str(reader.read_bytes(), "utf-8"))
+        offsets = reader.read_array()
+        string_data = reader.read_bytes()
+        columnar.strings = StringTable(
+            str(string_data[start:end], "utf-8") for start, end in zip(offsets, offsets[1:])
+        )
+        for column in COLUMNS:
+            setattr(columnar, column, reader.read_array())
+    except SerialisationError:
+        raise
+    except ValueError as e:
+        # e.g. an unknown array typecode or a string which is not valid UTF-8
+        raise SerialisationError("Serialised db is corrupt: {}".format(e))
+    return columnar
+
+
+def load_db(data):
+    """
+    This method loads a db serialised by dumps as a Db
+
+    Raises:
+        SerialisationError: if the data is not a complete serialised db
+    """
+    columnar = loads(data)
+    try:
+        return columnar.to_db()
+    except (IndexError, TypeError) as e:
+        raise SerialisationError("Serialised db is corrupt: {}".format(e))
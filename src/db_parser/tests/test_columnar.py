@@ -0,0 +1,46 @@
+import unittest
+
+import src.db_parser.columnar as col
+import src.db_parser.epics_collections as ec
+
+
+class TestColumnarDb(unittest.TestCase):
+    def setUp(self):
+        self.db = ec.Db(
+            "path",
+            [
+                ec.Record(
+                    "ai",
+                    "TEMP",
+                    [ec.Field("INTEREST", "HIGH")],
+                    [ec.Field("DESC", "Temperature"), ec.Field("EGU", "K", has_macro=True)],
+                    ["TEMP:ALIAS"],
+                ),
+                ec.Record("bo", "SWITCH", [], [ec.Field("DESC", "Switch")], []),
+                ec.Record("ai", "TEMP", [], [], []),
+            ],
+        )
+        self.columnar = col.ColumnarDb.from_db(self.db)
+
+    def assert_records_equal(self, rec1, rec2):
+        self.assertEqual(rec1.type, rec2.type)
+        self.assertEqual(rec1.pv, rec2.pv)
+        self.assertListEqual(
+            [(f.name, f.value, f.has_macro) for f in rec1.fields],
+            [(f.name, f.value, f.has_macro) for f in rec2.fields],
+        )
+        self.assertListEqual([i.unpack() for i in rec1.infos], [i.unpack() for i in rec2.infos])
+        self.assertListEqual(rec1.aliases, rec2.aliases)
+
+    def test_len(self):
+        self.assertEqual(len(self.columnar), len(self.db))
+
+    def test_strings_are_stored_once(self):
+        self.assertEqual(self.columnar.record_names[0], self.columnar.record_names[2])
+        self.assertEqual(len(self.columnar.strings), len(set(self.columnar.strings.strings)))
+
+    def test_round_trip(self):
+        db = self.columnar.to_db()
+        self.assertEqual(db.directory, self.db.directory)
+        for rec1, rec2 in zip(db.records, self.db.records):
+            self.assert_records_equal(rec1, rec2)
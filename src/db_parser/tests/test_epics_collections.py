@@ -23,6 +23,60 @@ class TestDBs(unittest.TestCase):
         db = ec.Db("", record)
         self.assertEqual(len(db), len(record))
 
+    def make_indexed_db(self):
+        return ec.Db(
+            "",
+            [
+                ec.Record("ai", "pv1", [ec.Field("INTEREST", "HIGH")], [ec.Field("EGU", "K")], []),
+                ec.Record("calc", "pv2", [ec.Field("log_header1", "a")], [], []),
+                ec.Record(
+                    "ai",
+                    "pv3",
+                    [ec.Field("INTEREST", "HIGH"), ec.Field("INTEREST", "LOW")],
+                    [ec.Field("DESC", "d")],
+                    [],
+                ),
+            ],
+        )
+
+    def test_get_records_of_type(self):
+        db = self.make_indexed_db()
+        self.assertListEqual([r.pv for r in db.get_records_of_type({"ai"})], ["pv1", "pv3"])
+        self.assertListEqual(
+            [r.pv for r in db.get_records_of_type({"calc", "ai"})], ["pv1", "pv2", "pv3"]
+        )
+        self.assertListEqual(db.get_records_of_type({"bo"}), [])
+
+    def test_get_records_with_info_lists_each_record_once(self):
+        db = self.make_indexed_db()
+        self.assertListEqual([r.pv for r in db.get_records_with_info({"INTEREST"})], ["pv1", "pv3"])
+
+    def test_get_records_with_field(self):
+        db = self.make_indexed_db()
+        self.assertListEqual([r.pv for r in db.get_records_with_field({"DESC"})], ["pv3"])
+
+    def test_get_record_positions(self):
+        db = self.make_indexed_db()
+        self.assertListEqual(db.get_record_positions(), [0, 1, 2])
+        self.assertListEqual(db.get_record_positions(rec_types={"ai"}), [0, 2])
+        self.assertListEqual(
+            db.get_record_positions(rec_types={"ai"}, info_names={"INTEREST"}, field_names={"EGU"}),
+            [0],
+        )
+        self.assertListEqual(db.get_record_positions(info_names=set()), [])
+
+    def test_get_info_names(self):
+        db = self.make_indexed_db()
+        self.assertCountEqual(db.get_info_names(), ["INTEREST", "log_header1"])
+
+    def test_indexes_follow_added_records(self):
+        db = self.make_indexed_db()
+        self.assertEqual(len(db.get_records_of_type({"ai"})), 2)
+        db.records.append(ec.Record("ai", "pv4", [], [], []))
+        self.assertEqual(len(db.get_records_of_type({"ai"})), 3)
+        db.records = []
+        self.assertListEqual(db.get_records_of_type({"ai"}), [])
+
 
 class TestRecords(unittest.TestCase):
     name_list = ["field1", "field2", "field3", "field4", "field5"]
@@ -116,3 +170,89 @@ class TestRecords(unittest.TestCase):
     def test_is_interest_empty(self):
         test_record = ec.Record("test", "TEST:1", [], [], [])
         self.assertFalse(test_record.is_interest())
+
+    def test_field_names_are_interned(self):
+        name = "".join(["D", "E", "S", "C"])
+        self.assertIs(ec.Field(name, "a").name, ec.Field("DESC", "b").name)
+
+    def test_records_and_fields_have_no_instance_dict(self):
+        test_record = ec.Record("test", "TEST:1", [], self.field_list, [])
+        self.assertFalse(hasattr(test_record, "__dict__"))
+        self.assertFalse(hasattr(self.field_list[0], "__dict__"))
+
+    def test_shared_empty_list_cannot_be_modified(self):
+        with self.assertRaises(TypeError):
+            ec.EMPTY_LIST.append("alias")
+        self.assertEqual(ec.EMPTY_LIST, [])
+
+    def test_add_alias_to_shared_empty_aliases(self):
+        test_record = ec.Record("test", "TEST:1", ec.EMPTY_LIST, [], ec.EMPTY_LIST)
+        test_record.add_alias("ALIAS")
+        self.assertListEqual(test_record.aliases, ["ALIAS"])
+        self.assertEqual(ec.EMPTY_LIST, [])
+
+    def test_is_sim_is_cached(self):
+        test_record = ec.Record("test", "ISSIM:1", [], [], [])
+        self.assertTrue(test_record.is_sim())
+        test_record.pv = "TEST:1"
+        self.assertTrue(test_record.is_sim())
+        self.assertTrue(test_record.simulation)
+
+    def test_field_from_source(self):
+        source = 'field(EGU, "mA")'
+        field = ec.Field.from_source("EGU", source, 12, 14)
+        self.assertEqual(field.value_length(), 2)
+        self.assertEqual(field.value, "mA")
+        self.assertEqual(field.unpack(), ("EGU", "mA"))
+
+    def test_field_value_can_be_set(self):
+        field = ec.Field.from_source("EGU", 'field(EGU, "mA")', 12, 14)
+        field.value = "V"
+        self.assertEqual(field.value, "V")
+        self.assertEqual(field.value_length(), 1)
+
+    def test_ordered_fingerprint_depends_on_field_order(self):
+        rec1 = ec.Record("ai", "PV", [], [ec.Field("A", "1"), ec.Field("B", "2")], [])
+        rec2 = ec.Record("ai", "PV", [], [ec.Field("B", "2"), ec.Field("A", "1")], [])
+        rec3 = ec.Record("ai", "PV", [], [ec.Field("A", "1"), ec.Field("B", "2")], [])
+        self.assertNotEqual(rec1.get_ordered_fingerprint(), rec2.get_ordered_fingerprint())
+        self.assertEqual(rec1.get_ordered_fingerprint(), rec3.get_ordered_fingerprint())
+
+    def test_fingerprint_ignores_field_order(self):
+        rec1 = ec.Record("ai", "TEMP", [], [ec.Field("DESC", "a"), ec.Field("EGU", "K")], [])
+        rec2 = ec.Record("ai", "TEMP", [], [ec.Field("EGU", "K"), ec.Field("DESC", "a")], [])
+        self.assertEqual(rec1.get_fingerprint(), rec2.get_fingerprint())
+        self.assertTrue(rec1.same_content(rec2))
+
+    def test_fingerprint_differs_on_content(self):
+        base = ec.Record("ai", "TEMP", [], [ec.Field("DESC", "a")], [])
+        others = [
+            ec.Record("ao", "TEMP", [], [ec.Field("DESC", "a")], []),
+            ec.Record("ai", "TEMP2", [], [ec.Field("DESC", "a")], []),
+            ec.Record("ai", "TEMP", [], [ec.Field("DESC", "b")], []),
+            ec.Record("ai", "TEMP", [], [ec.Field("DESC", "a", has_macro=True)], []),
+            ec.Record("ai", "TEMP", [ec.Field("DESC", "a")], [], []),
+            ec.Record("ai", "TEMP", [], [ec.Field("DESC", "a")], ["ALIAS"]),
+        ]
+        for other in others:
+            self.assertFalse(base.same_content(other))
+
+    def test_fingerprint_sections_do_not_collide(self):
+        rec1 = ec.Record("ai", "TEMP", [ec.Field("aliases", "ALIAS")], [], [])
+        rec2 = ec.Record("ai", "TEMP", [], [], ["ALIAS", "aliases"])
+        self.assertNotEqual(rec1.get_fingerprint(), rec2.get_fingerprint())
+        self.assertNotEqual(rec1.get_ordered_fingerprint(), rec2.get_ordered_fingerprint())
+
+    def test_fingerprint_updated_by_add_alias(self):
+        test_record = ec.Record("ai", "TEMP", [], [], ec.EMPTY_LIST)
+        before = test_record.get_fingerprint()
+        test_record.add_alias("ALIAS")
+        self.assertNotEqual(test_record.get_fingerprint(), before)
+
+    def test_db_fingerprint(self):
+        db1 = ec.Db("a", [ec.Record("ai", "A", [], [], []), ec.Record("ai", "B", [], [], [])])
+        db2 = ec.Db("b", [ec.Record("ai", "A", [], [], []), ec.Record("ai", "B", [], [], [])])
+        self.assertTrue(db1.same_content(db2))
+
+        db2.records.append(ec.Record("ai", "C", [], [], []))
+        self.assertFalse(db1.same_content(db2))
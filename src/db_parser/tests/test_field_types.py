@@ -0,0 +1,105 @@
+import unittest
+
+import src.db_parser.epics_collections as ec
+import src.db_parser.field_types as ft
+
+
+class TestConvertFieldValue(unittest.TestCase):
+    def test_integer(self):
+        self.assertEqual(ft.convert_field_value("NELM", "100"), (100, None))
+
+    def test_hex_integer(self):
+        self.assertEqual(ft.convert_field_value("NELM", "0x10"), (16, None))
+
+    def test_integer_out_of_range(self):
+        self.assertEqual(ft.convert_field_value("NELM", "-1"), (None, "out of range"))
+
+    def test_invalid_integer(self):
+        self.assertEqual(ft.convert_field_value("PREC", "1.5"), (None, "not a valid value"))
+
+    def test_double(self):
+        self.assertEqual(ft.convert_field_value("HOPR", "5.0"), (5.0, None))
+
+    def test_menu_choice(self):
+        self.assertEqual(ft.convert_field_value("SCAN", ".1 second"), (".1 second", None))
+
+    def test_menu_index(self):
+        self.assertEqual(ft.convert_field_value("PINI", "1"), ("YES", None))
+
+    def test_menu_index_out_of_range(self):
+        self.assertEqual(ft.convert_field_value("PINI", "10"), (None, "menu index out of range"))
+
+    def test_invalid_menu_choice(self):
+        self.assertEqual(ft.convert_field_value("SCAN", "sometimes"), (None, "not a valid value"))
+
+    def test_macro_not_converted_or_reported(self):
+        self.assertEqual(ft.convert_field_value("NELM", "$(NELM=10)"), (None, None))
+
+    def test_unknown_field_unchanged(self):
+        self.assertEqual(ft.convert_field_value("DESC", "Hello"), ("Hello", None))
+
+    def test_limit_on_integer_record(self):
+        self.assertEqual(ft.convert_field_value("HIGH", "0x10", "longin"), (16, None))
+        self.assertEqual(
+            ft.convert_field_value("DRVH", "1.5", "longout"), (None, "not a valid value")
+        )
+        self.assertEqual(ft.convert_field_value("HIGH", "1.5", "ai"), (1.5, None))
+
+    def test_get_field_type(self):
+        self.assertEqual(ft.get_field_type("HOPR", "int64in"), "DBF_INT64")
+        self.assertEqual(ft.get_field_type("HOPR", "ao"), "DBF_DOUBLE")
+        self.assertEqual(ft.get_field_type("NELM", "longin"), "DBF_ULONG")
+        self.assertIsNone(ft.get_field_type("DESC", "longin"))
+
+
+class TestRecordTypedFields(unittest.TestCase):
+    def setUp(self):
+        self.record = ec.Record(
+            "waveform",
+            "WAVE",
+            [],
+            [
+                ec.Field("NELM", "100"),
+                ec.Field("PREC", "many"),
+                ec.Field("SCAN", "1 second"),
+                ec.Field("DESC", "A waveform"),
+            ],
+            [],
+        )
+
+    def test_get_typed_field_value(self):
+        self.assertEqual(self.record.get_typed_field_value("NELM"), 100)
+        self.assertEqual(self.record.get_typed_field_value("SCAN"), "1 second")
+        self.assertEqual(self.record.get_typed_field_value("DESC"), "A waveform")
+
+    def test_get_typed_field_value_missing_or_invalid(self):
+        self.assertIsNone(self.record.get_typed_field_value("HOPR"))
+        self.assertIsNone(self.record.get_typed_field_value("PREC"))
+
+    def test_get_typed_field_value_is_cached(self):
+        self.assertEqual(self.record.get_typed_field_value("NELM"), 100)
+        self.record.fields[0].value = "200"
+        self.assertEqual(self.record.get_typed_field_value("NELM"), 100)
+
+    def test_get_field_diagnostics(self):
+        diagnostics = self.record.get_field_diagnostics()
+
+        self.assertEqual(len(diagnostics), 1)
+        self.assertEqual(diagnostics[0].record, "WAVE")
+        self.assertEqual(diagnostics[0].field, "PREC")
+        self.assertEqual(diagnostics[0].field_type, "DBF_SHORT")
+        self.assertEqual(
+            str(diagnostics[0]),
+            "Invalid DBF_SHORT value 'many' for PREC on WAVE: not a valid value",
+        )
+
+    def test_get_field_diagnostics_integer_record(self):
+        record = ec.Record(
+            "longin", "LONG", [], [ec.Field("HIGH", "0x10"), ec.Field("LOW", "0.5")], []
+        )
+        self.assertEqual(record.get_typed_field_value("HIGH"), 16)
+        diagnostics = record.get_field_diagnostics()
+        self.assertListEqual(
+            [str(diagnostic) for diagnostic in diagnostics],
+            ["Invalid DBF_LONG value '0.5' for LOW on LONG: not a valid value"],
+        )
@@ -205,3 +205,12 @@ class LexerTests(unittest.TestCase):
         self.assertEqual(tokens[0].type, TokenTypes.HASH)
         self.assertEqual(tokens[-2].type, TokenTypes.RECORD)
         self.assertEqual(tokens[-1].type, TokenTypes.EOF)
+
+    def test_WHEN_lexer_lexes_multiple_lines_THEN_token_offsets_are_from_start_of_input(self):
+        text = 'record\n  field(DESC, "A")'
+        tokens = get_tokens_list(Lexer(text))
+
+        for token in tokens[:-1]:
+            self.assertEqual(
+                text[token.offset : token.offset + len(token.contents)], token.contents
+            )
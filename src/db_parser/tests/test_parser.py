@@ -1,7 +1,9 @@
 import unittest
+from os.path import join
 
 from src.db_parser.common import DbSyntaxError
-from src.db_parser.lexer import Token
+from src.db_parser.epics_collections import EMPTY_LIST
+from src.db_parser.lexer import Lexer, Token
 from src.db_parser.parser import Parser
 from src.db_parser.tokens import TokenTypes
 
@@ -347,6 +349,8 @@ class ParserTests(unittest.TestCase):
         self.assertEqual(rec2.get_type(), rec_type_2)
         self.assertEqual(rec1.pv, rec_name_1)
         self.assertEqual(rec2.pv, rec_name_2)
+        self.assertIs(rec1.aliases, EMPTY_LIST)
+        self.assertIs(rec2.infos, EMPTY_LIST)
 
     def test_GIVEN_record_containing_macros_WHEN_parse_record_THEN_parser_can_find_fields_with_starting_macro(
         self,
@@ -383,3 +387,27 @@ class ParserTests(unittest.TestCase):
 
         parsed_macro = Parser(lexer).macro()
         self.assertEqual(parsed_macro, "")
+
+
+class ParserLazyValueTests(unittest.TestCase):
+    def test_GIVEN_lazy_values_WHEN_parse_test_dbs_THEN_values_match_eager_parse(self):
+        for filename in ["examples.db", "test_all.db", "test_log_info_errors.db", "kepco.db"]:
+            with open(join("check_db_file_tests", filename)) as f:
+                text = f.read()
+            eager = Parser(Lexer(text)).db()
+            lazy = Parser(Lexer(text), lazy_values=True).db()
+            for eager_rec, lazy_rec in zip(eager.records, lazy.records):
+                self.assertListEqual(
+                    [f.unpack() for f in eager_rec.fields], [f.unpack() for f in lazy_rec.fields]
+                )
+                self.assertListEqual(
+                    [i.unpack() for i in eager_rec.infos], [i.unpack() for i in lazy_rec.infos]
+                )
+
+    def test_GIVEN_lazy_values_WHEN_parse_field_THEN_value_built_on_read(self):
+        db = Parser(Lexer('record(ai, "A") { field(DESC, "Hello") }'), lazy_values=True).db()
+        field = db.records[0].fields[0]
+
+        self.assertEqual(field.value_length(), 5)
+        self.assertEqual(field.value, "Hello")
+        self.assertEqual(field.value_length(), 5)
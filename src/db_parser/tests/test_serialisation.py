@@ -0,0 +1,72 @@
+import pickle
+import unittest
+from os.path import join
+
+import src.db_parser.serialisation as ser
+from src.db_parser.common import SerialisationError
+from src.db_parser.lexer import Lexer
+from src.db_parser.parser import Parser
+
+TEST_FOLDER = "check_db_file_tests"
+
+
+def parse_file(filename):
+    with open(join(TEST_FOLDER, filename)) as f:
+        return Parser(Lexer(f.read())).db()
+
+
+class TestSerialisation(unittest.TestCase):
+    def assert_dbs_equal(self, db1, db2):
+        self.assertEqual(db1.directory, db2.directory)
+        self.assertEqual(len(db1), len(db2))
+        for rec1, rec2 in zip(db1.records, db2.records):
+            self.assertEqual(rec1.type, rec2.type)
+            self.assertEqual(rec1.pv, rec2.pv)
+            self.assertListEqual(
+                [(f.name, f.value, f.has_macro) for f in rec1.fields],
+                [(f.name, f.value, f.has_macro) for f in rec2.fields],
+            )
+            self.assertListEqual([i.unpack() for i in rec1.infos], [i.unpack() for i in rec2.infos])
+            self.assertListEqual(rec1.aliases, rec2.aliases)
+        self.assertListEqual(db1.unresolved_aliases, db2.unresolved_aliases)
+
+    def test_round_trip(self):
+        for filename in ["examples.db", "test_all.db", "kepco.db"]:
+            db = parse_file(filename)
+            self.assert_dbs_equal(ser.load_db(ser.dumps(db)), db)
+
+    def test_round_trip_non_ascii(self):
+        db = Parser(Lexer('record(ai, "TEMP") {field(DESC, "Température")}')).db()
+        self.assert_dbs_equal(ser.load_db(ser.dumps(db)), db)
+
+    def test_round_trip_unresolved_aliases(self):
+        db = Parser(Lexer('alias("$(P)A", "$(P)B")')).db()
+        self.assertListEqual(ser.load_db(ser.dumps(db)).unresolved_aliases, [("$(P)A", "$(P)B")])
+
+    def test_loads_builds_records_on_access(self):
+        columnar = ser.loads(ser.dumps(parse_file("kepco.db")))
+        self.assertEqual(columnar.record(0).pv, parse_file("kepco.db").records[0].pv)
+
+    def test_smaller_than_pickle(self):
+        db = parse_file("Agilent_33220A.db")
+        self.assertLess(len(ser.dumps(db)), len(pickle.dumps(db)))
+
+    def test_loads_rejects_other_data(self):
+        with self.assertRaises(SerialisationError):
+            ser.loads(b"not a db")
+
+    def test_loads_rejects_truncated_data(self):
+        with self.assertRaises(SerialisationError):
+            ser.loads(ser.dumps(parse_file("kepco.db"))[:-10])
+
+    def test_load_db_rejects_missing_strings(self):
+        columnar = ser.loads(ser.dumps(parse_file("kepco.db")))
+        columnar.record_types[0] = len(columnar.strings)
+        with self.assertRaises(SerialisationError):
+            ser.load_db(ser.dumps(columnar))
+
+    def test_loads_rejects_invalid_strings(self):
+        data = ser.dumps(parse_file("kepco.db"))
+        name = parse_file("kepco.db").records[0].pv.encode("utf-8")
+        with self.assertRaises(SerialisationError):
+            ser.loads(data.replace(name, b"\xff" * len(name)))
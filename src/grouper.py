@@ -2,6 +2,7 @@ import re
 
 from src.db_parser.lexer import Lexer
 from src.db_parser.parser import Parser
+from src.names import analyse_name
 
 
 class RecordGroup:
@@ -32,72 +33,57 @@ class Grouper:
         for name in names:
             self.find_record_type(name)
 
+        # Index the groups by the stem of their key, which is the stem that names must have
+        # to be the group's SP or SP:RBV. A key can have a stem of its own, e.g. the key of
+        # DUMMYPV:SP:SP is DUMMYPV:SP whose stem is DUMMYPV.
+        groups_by_stem = {}
+        for s in self.record_groups.keys():
+            groups_by_stem.setdefault(self.get_stem(s), []).append(self.record_groups[s])
+
         # Now find the related names
         for name in names:
             # get all aliases
+            group_name = self.get_stem(name)
+            group = self.record_groups[group_name]
             for alias in record_dict[name].aliases:
-                group_name = self.get_stem(name)
-                ma1, ma2 = find_related_type(alias, group_name)
+                stem, kind = split_name(alias)
                 # put alias in correct type, since its an alias for this record,
                 # must be at least one
-
-                if ma1 is not None:
-                    self.record_groups[group_name].SP = alias
-                elif ma2 is not None:
-                    self.record_groups[group_name].SP_RBV = alias
+                if kind is not None and stem == group_name:
+                    setattr(group, kind, alias)
                 elif alias == group_name:
-                    self.record_groups[group_name].RB = alias
-
-            for s in self.record_groups.keys():
-                # Don't read the first name
-                if name == self.record_groups[s].main:
-                    continue
+                    group.RB = alias
 
-                ma1, ma2 = find_related_type(name, self.get_stem(s))
-
-                # put record in matching type if it matches any
-                if ma1 is not None:
-                    self.record_groups[s].SP = name
-                elif ma2 is not None:
-                    self.record_groups[s].SP_RBV = name
-                elif s == name:
-                    self.record_groups[s].RB = name
+            stem, kind = split_name(name)
+            if kind is not None:
+                # put record in matching type in every group with its stem
+                for group in groups_by_stem.get(stem, ()):
+                    # Don't read the first name
+                    if name != group.main:
+                        setattr(group, kind, name)
+            elif name in self.record_groups and name != self.record_groups[name].main:
+                self.record_groups[name].RB = name
 
         if debug:
             self.print_groups()
         return self.record_groups
 
     def get_stem(self, name):
-        ma1 = re.match(r"(.+)[_:](SP|SETPOINT|SETP|SEP|SETPT)[_:](RBV|RB|READBACK|READ)$", name)
-        ma2 = re.match(r"(.+)[_:](SP|SETPOINT|SETP|SEP|SETPT)$", name)
-        group_name = name
-        if ma1 is not None:
-            group_name = ma1.groups()[0]
-        elif ma2 is not None:
-            group_name = ma2.groups()[0]
-        return group_name
+        return split_name(name)[0]
 
     def find_record_type(self, name):
         # Stems are pure records, not aliases
-        ma1 = re.match(r"(.+)[_:](SP|SETPOINT|SETP|SEP|SETPT)[_:](RBV|RB|READBACK|READ)$", name)
-        ma2 = re.match(r"(.+)[_:](SP|SETPOINT|SETP|SEP|SETPT)$", name)
-        if ma1 is None and ma2 is None:
+        stem, kind = split_name(name)
+        if kind is None:
             # Something like DUMMYPV would get here
             if name not in self.record_groups.keys():
                 self.record_groups[name] = RecordGroup(name, name)
                 self.record_groups[name].RB = name
         else:
             # Something like DUMMYPV:SP or DUMMYPV:SP:RBV would get here
-            if ma1 is not None:
-                stem = ma1.groups()[0]
-                if stem not in self.record_groups.keys():
-                    self.record_groups[stem] = RecordGroup(stem, name)
-                    self.record_groups[stem].SP_RBV = name
-            else:
-                stem = ma2.groups()[0]
-                if stem not in self.record_groups.keys():
-                    self.record_groups[stem] = RecordGroup(stem, name)
-                    self.record_groups[stem].SP = name
+            if stem not in self.record_groups.keys():
+                self.record_groups[stem] = RecordGroup(stem, name)
+                setattr(self.record_groups[stem], kind, name)
 
     def print_groups(self):
         for s in self.record_groups.keys():
@@ -111,6 +97,157 @@ class Grouper:
             )
 
 
+class IncrementalGrouper(Grouper):
+    """A grouper which keeps its groups up to date as records are added, removed or have
+    their aliases changed. Only the groups sharing a stem with the changed record are
+    regrouped, and each update returns the keys of the groups which changed, so that only
+    those need to be checked again. The groups are always the same as group_records would
+    give for the current records."""
+
+    def __init__(self):
+        super(IncrementalGrouper, self).__init__()
+        self.aliases = {}  # record name -> its aliases
+        self.names_by_stem = {}  # stem -> names of the records with that stem
+        # The group keys are the stems with records, and these are indexed by their own stem
+        self.keys_by_stem = {}
+
+    def group_records(self, record_dict, debug=False):
+        self.record_groups = {}
+        self.aliases = {}
+        self.names_by_stem = {}
+        self.keys_by_stem = {}
+        for name, record in record_dict.items():
+            self.aliases[name] = list(record.aliases)
+            self._index_name(name)
+        super(IncrementalGrouper, self).group_records(record_dict, debug)
+        return self.get_groups()
+
+    def get_groups(self):
+        """
+        This method returns the groups in the order group_records would give them, which is
+        the order of their main names
+        """
+        return {
+            key: group
+            for key, group in sorted(self.record_groups.items(), key=lambda item: item[1].main)
+        }
+
+    def add_record(self, name, aliases=()):
+        """
+        This method adds a record, or replaces the aliases of an existing record
+
+        Returns:
+            the keys of the groups which changed
+        """
+        if name not in self.aliases:
+            self._index_name(name)
+        self.aliases[name] = list(aliases)
+        return self._regroup_around(name)
+
+    def remove_record(self, name):
+        """
+        This method removes a record
+
+        Returns:
+            the keys of the groups which changed
+        """
+        if name not in self.aliases:
+            return set()
+        del self.aliases[name]
+        stem = self.get_stem(name)
+        names = self.names_by_stem[stem]
+        names.discard(name)
+        if not names:
+            del self.names_by_stem[stem]
+            keys = self.keys_by_stem[self.get_stem(stem)]
+            keys.discard(stem)
+            if not keys:
+                del self.keys_by_stem[self.get_stem(stem)]
+        return self._regroup_around(name)
+
+    def set_aliases(self, name, aliases):
+        """
+        This method replaces the aliases of an existing record
+
+        Returns:
+            the keys of the groups which changed
+        """
+        if name not in self.aliases:
+            raise KeyError(name)
+        return self.add_record(name, aliases)
+
+    def _index_name(self, name):
+        stem = self.get_stem(name)
+        if stem not in self.names_by_stem:
+            self.names_by_stem[stem] = set()
+            self.keys_by_stem.setdefault(self.get_stem(stem), set()).add(stem)
+        self.names_by_stem[stem].add(name)
+
+    def _regroup_around(self, name):
+        # A name only affects the group keyed on its stem, and if it has a setpoint suffix,
+        # the groups whose keys have the same stem as it
+        stem, kind = split_name(name)
+        keys = {stem}
+        if kind is not None:
+            keys.update(self.keys_by_stem.get(stem, ()))
+        changed = set()
+        for key in keys:
+            old = self.record_groups.pop(key, None)
+            new = self._make_group(key)
+            if new is not None:
+                self.record_groups[key] = new
+            if _group_contents(old) != _group_contents(new):
+                changed.add(key)
+        return changed
+
+    def _make_group(self, key):
+        # Regroups the names which affect the group with the given key, in the same order
+        # as group_records
+        members = self.names_by_stem.get(key)
+        if not members:
+            return None
+        main = min(members)
+        group = RecordGroup(key, main)
+        setattr(group, split_name(main)[1] or "RB", main)
+
+        key_stem = self.get_stem(key)
+        related = set(members)
+        related.update(name for name in self.names_by_stem.get(key_stem, ()) if split_name(name)[1])
+        for name in sorted(related):
+            stem, kind = split_name(name)
+            if stem == key:
+                for alias in self.aliases[name]:
+                    alias_stem, alias_kind = split_name(alias)
+                    if alias_kind is not None and alias_stem == key:
+                        setattr(group, alias_kind, alias)
+                    elif alias == key:
+                        group.RB = alias
+            if kind is not None:
+                if stem == key_stem and name != main:
+                    setattr(group, kind, name)
+            elif name == key and name != main:
+                group.RB = name
+        return group
+
+
+def _group_contents(group):
+    if group is None:
+        return None
+    return group.stem, group.main, group.RB, group.SP, group.SP_RBV
+
+
+def split_name(name):
+    """
+    This method splits a name into its stem and the kind of name it is in its group
+
+    Returns:
+        tuple of the stem and SP, SP_RBV or None if the name has no setpoint suffix, in which
+        case the stem is the whole name
+    """
+    info = analyse_name(name)
+    return info.stem, info.kind
+
+
 def find_related_type(search, name):
     ma1 = re.match("^" + re.escape(name) + r"[_:](SP|SETPOINT|SETP|SEP|SETPT)$", search)
     ma2 = re.match(
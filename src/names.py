@@ -0,0 +1,74 @@
+"""
+This file analyses record names into the parts used by the grouper, the db checker and
+add_sim_records, e.g. $(P)TEMP:SP:RBV has the macro prefix $(P), the stem $(P)TEMP and is
+the SP:RBV of its group.
+"""
+
+import re
+from functools import lru_cache
+
+# The kinds of name in a group
+SP = "SP"
+SP_RBV = "SP_RBV"
+
+# Matches every name. The macro prefix is everything up to the last closing bracket of a name
+# containing a macro, and the setpoint suffix is an SP word, optionally followed by an RBV
+# word, each after a separator.
+NAME_PATTERN = re.compile(
+    r"(?P<macro>(?=.*\$).*\))?"
+    r"(?:(?P<body>.*)(?P<separator>[_:])(?:SP|SETPOINT|SETP|SEP|SETPT)"
+    r"(?P<readback>[_:](?:RBV|RB|READBACK|READ))?$|.*$)"
+)
+
+
+class NameInfo:
+    """
+    This class holds the parts of a record name
+        name: the whole name
+        has_macro: whether the name contains a macro
+        macro: the macro prefix, up to the last closing bracket if the name has a macro, or ""
+        base: the name after the macro prefix, which may start with a colon
+        stem: the name without its setpoint suffix, or the whole name if it has none
+        kind: SP or SP_RBV if the name has a setpoint suffix, otherwise None
+        separator: the character before the setpoint suffix, or None if it has none
+    """
+
+    __slots__ = ("name", "has_macro", "macro", "base", "stem", "kind", "separator")
+
+    def __init__(self, name, has_macro, macro, stem, kind, separator):
+        self.name = name
+        self.has_macro = has_macro
+        self.macro = macro
+        self.base = name[len(macro) :]
+        self.stem = stem
+        self.kind = kind
+        self.separator = separator
+
+    def without_macro(self, remove_colon=True):
+        """
+        This method returns the name without its macro prefix, and without a colon following
+        the macro if remove_colon is set
+        """
+        if remove_colon and self.has_macro and self.base.startswith(":"):
+            return self.base[1:]
+        return self.base
+
+
+@lru_cache(maxsize=65536)
+def analyse_name(name):
+    """
+    This method splits a record name into its parts in a single match. Results are cached
+    per name.
+
+    Returns:
+        a NameInfo
+    """
+    match = NAME_PATTERN.match(name)
+    macro = match.group("macro") or ""
+    separator = match.group("separator")
+    stem = macro + (match.group("body") or "")
+    if separator is None or not stem:
+        # No setpoint suffix, or nothing before it
+        return NameInfo(name, "$" in name, macro, name, None, None)
+    kind = SP_RBV if match.group("readback") else SP
+    return NameInfo(name, "$" in name, macro, stem, kind, separator)
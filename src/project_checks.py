@@ -0,0 +1,112 @@
+"""
+Checks which need the records of every db in a Project at once. Each check makes a single
+pass over the project's global indexes, rather than comparing files pairwise.
+"""
+
+from src.pv_checks import check_changed_period, check_repeated_log
+
+PERIOD_TAGS = ("log_period_seconds", "log_period_pv")
+
+
+def get_files(entries):
+    """
+    This method returns the distinct filenames of a list of (filename, record) pairs, in order
+    of first appearance
+    """
+    return list(dict.fromkeys(filename for filename, _ in entries))
+
+
+def get_multiple_instances_across_files(project):
+    """
+    This method warns if a PV name is defined in more than one file of the project
+    """
+    failures = []
+    for name, entries in project.pv_index.items():
+        files = get_files(entries)
+        if len(files) > 1:
+            failures.append("Multiple instances of {} in {}".format(name, ", ".join(files)))
+    return failures
+
+
+def get_alias_clashes(project):
+    """
+    This method checks that no alias is also a record name, and that no alias is used for
+    more than one record
+    """
+    failures = []
+    for alias, entries in project.alias_index.items():
+        if alias in project.pv_index:
+            failures.append(
+                "Alias {} of {} is also a record in {}".format(
+                    alias, entries[0][1], ", ".join(get_files(project.pv_index[alias]))
+                )
+            )
+        records = list({id(rec): rec for _, rec in entries}.values())
+        if len(records) > 1:
+            failures.append(
+                "Alias {} is used for multiple records: {}".format(
+                    alias, ", ".join(str(rec) for rec in records)
+                )
+            )
+    return failures
+
+
+def get_unresolved_aliases(project):
+    """
+    This method warns about DB-level aliases whose record is not in any file of the project
+    """
+    return [
+        "Alias {} in {} refers to {} which is not in the project".format(alias, filename, pv)
+        for filename, pv, alias in project.get_unresolved_aliases()
+    ]
+
+
+def get_log_info_tags_across_files(project):
+    """
+    This method checks that logging tags are not repeated, and that the period is not defined
+    in two ways, across the files of the project. Conflicts within a single file are left to
+    the log_info_tags pv check, so only the first use of each tag in a file is compared.
+    """
+    failures = []
+    log_fields = {}
+    logging_period = None
+
+    for db in project.dbs.values():
+        file_tags = set()
+        file_sets_period = False
+        log_info_names = {
+            name for name in db.get_info_names() if name.lower().strip('"').startswith("log")
+        }
+        for rec in db.get_records_with_info(log_info_names):
+            for info in rec.infos:
+                info_name = info.name.lower().strip('"')
+                if not info_name.startswith("log"):
+                    continue
+                if info_name not in file_tags:
+                    file_tags.add(info_name)
+                    check_repeated_log(failures, info_name, info.value, log_fields, rec)
+                if info_name in PERIOD_TAGS and not file_sets_period:
+                    file_sets_period = True
+                    logging_period = check_changed_period(
+                        failures, info_name, info.value, logging_period, rec
+                    )
+    return failures
+
+
+# List of Errors to check for.
+check_error = [get_alias_clashes, get_log_info_tags_across_files]
+# List of Warnings to check for.
+check_warning = [get_multiple_instances_across_files, get_unresolved_aliases]
+
+
+def run_project_checks(project):
+    """
+    This method runs through the project checks and returns the all warnings and errors.
+    """
+    errors = []
+    warnings = []
+    for check in check_error:
+        errors.extend(check(project))
+    for check in check_warning:
+        warnings.extend(check(project))
+    return warnings, errors
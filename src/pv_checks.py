@@ -1,5 +1,11 @@
+import hashlib
+import json
+import os
 import re
-from collections import defaultdict
+import time
+from collections import OrderedDict, defaultdict
+
+from src.unit_parser import iter_nodes, parse_unit
 
 # list of those record types that should have a EGU field
 EGU_list = {
@@ -103,13 +109,15 @@ allowed_standalone_units = {
     "ev/trg", # for CAENMCA
 }
 
+# The maximum length of a DESC field, ignoring macros
+desc_max_length = 40
+
+# Matches the macros removed from DESC fields before their length is checked
+_MACRO = re.compile(r"\$\([^)]*\)")
 
-def process_units(processed_unit):
-    # remove 1\ as this is ok as a unit as in 1\m but 1 on its own is not ok
-    processed_unit = re.sub(r"1/", "", processed_unit).replace(" ", "")
-    # split unit amalgamations and remove powers
-    units_with_powers = re.split(r"[/ ()]", processed_unit)
-    return units_with_powers
+# Increase when a change to the unit checking logic (allowed_unit or src.unit_parser) changes
+# its verdicts, so cached check results are not used
+UNIT_LOGIC_VERSION = 1
 
 
 def expand_macro(raw_unit):
@@ -119,44 +127,206 @@ def expand_macro(raw_unit):
     return processed_unit
 
 
+def build_prefixed_units(unit_prefixes, prefixable_units):
+    """
+    This method returns every combination of a prefix and a prefixable unit
+    """
+    return frozenset(prefix + unit for prefix in unit_prefixes for unit in prefixable_units)
+
+
+# Every valid prefixed unit, e.g. "mA", "kV". Rebuilt by configure_units.
+prefixed_units = build_prefixed_units(allowed_unit_prefixes, allowed_prefixable_units)
+
+
+def configure_units(
+    prefixable_units=None, unit_prefixes=None, non_prefixable_units=None, standalone_units=None
+):
+    """
+    This method replaces any of the given allowed unit sets, rebuilds the prefixed unit table
+    from them and clears the cached unit verdicts
+    """
+    global allowed_prefixable_units, allowed_unit_prefixes
+    global allowed_non_prefixable_units, allowed_standalone_units, prefixed_units
+    if prefixable_units is not None:
+        allowed_prefixable_units = set(prefixable_units)
+    if unit_prefixes is not None:
+        allowed_unit_prefixes = set(unit_prefixes)
+    if non_prefixable_units is not None:
+        allowed_non_prefixable_units = set(non_prefixable_units)
+    if standalone_units is not None:
+        allowed_standalone_units = set(standalone_units)
+    prefixed_units = build_prefixed_units(allowed_unit_prefixes, allowed_prefixable_units)
+    update_rules_digest()
+    unit_verdicts.clear()
+
+
+def configure_rules(rules):
+    """
+    This method replaces all of the rule tables with those of a compiled rules config (see
+    src.rules) and clears the cached unit verdicts
+    """
+    global EGU_list, EGU_sub_list, ASG_list, desc_max_length
+    global allowed_prefixable_units, allowed_unit_prefixes
+    global allowed_non_prefixable_units, allowed_standalone_units, prefixed_units
+    EGU_list = rules.EGU_list
+    EGU_sub_list = rules.EGU_sub_list
+    ASG_list = rules.ASG_list
+    allowed_prefixable_units = rules.prefixable_units
+    allowed_unit_prefixes = rules.unit_prefixes
+    allowed_non_prefixable_units = rules.non_prefixable_units
+    allowed_standalone_units = rules.standalone_units
+    prefixed_units = rules.prefixed_units
+    desc_max_length = rules.desc_max_length
+    update_rules_digest()
+    unit_verdicts.clear()
+
+
+def get_rules_digest():
+    """
+    This method returns a hash of the rule tables in use and the version of the unit logic
+    """
+    rules = [
+        sorted(EGU_list),
+        sorted(EGU_sub_list),
+        sorted(ASG_list),
+        sorted(allowed_prefixable_units),
+        sorted(allowed_unit_prefixes),
+        sorted(allowed_non_prefixable_units),
+        sorted(allowed_standalone_units),
+        desc_max_length,
+        UNIT_LOGIC_VERSION,
+    ]
+    return hashlib.sha1(json.dumps(rules).encode("utf-8")).hexdigest()
+
+
+def update_rules_digest():
+    """
+    This method updates rules_digest after the rule tables have been changed
+    """
+    global rules_digest
+    rules_digest = get_rules_digest()
+
+
+# Identifies the rules in use, so that cached check results are only used with the rules they
+# were found with. Updated by configure_units and configure_rules.
+rules_digest = get_rules_digest()
+
+
 def is_prefixed_unit(unit):
     """
     This method checks if a given unit has a prefix
     """
-    unit_checklist = [
-        len(unit) > len(base_unit)
-        and unit[-len(base_unit) :] == base_unit
-        and unit[: -len(base_unit)] in allowed_unit_prefixes
-        for base_unit in allowed_prefixable_units
-    ]
-    return any(unit_checklist)
+    return unit in prefixed_units
+
+
+class UnitVerdictCache:
+    """
+    This class caches the verdicts of allowed_unit, keyed on the raw unit string, and counts
+    hits and misses. Once maxsize verdicts are held, the least recently used is dropped.
+    The verdicts can be exported as a table and loaded into the cache of another process.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.verdicts = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.verdicts)
+
+    def get(self, raw_unit):
+        """
+        This method returns the cached verdict for the unit, or None if there is none
+        """
+        verdict = self.verdicts.get(raw_unit)
+        if verdict is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.verdicts.move_to_end(raw_unit)
+        return verdict
+
+    def put(self, raw_unit, verdict):
+        self.verdicts[raw_unit] = verdict
+        if len(self.verdicts) > self.maxsize:
+            self.verdicts.popitem(last=False)
+
+    def clear(self):
+        self.verdicts.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def export_table(self):
+        """
+        This method returns a dict of raw unit to verdict, for passing to load_table
+        """
+        return dict(self.verdicts)
+
+    def load_table(self, table):
+        """
+        This method adds precomputed verdicts to the cache
+        """
+        for raw_unit, verdict in table.items():
+            self.put(raw_unit, verdict)
+
+
+unit_verdicts = UnitVerdictCache()
 
 
 def allowed_unit(raw_unit):
     """
-    This method checks that the given unit conforms to standard
+    This method checks that the given unit conforms to standard.
+    Verdicts are cached in unit_verdicts.
+    """
+    verdict = unit_verdicts.get(raw_unit)
+    if verdict is None:
+        verdict = check_unit(raw_unit)
+        unit_verdicts.put(raw_unit, verdict)
+    return verdict
+
+
+def check_unit(raw_unit):
+    """
+    This method checks that the given unit conforms to standard, without using the cache
     """
     if raw_unit in allowed_standalone_units:
         return True
 
-    processed_unit = expand_macro(raw_unit)
-    units_with_powers = process_units(processed_unit)
+    tree = parse_unit(expand_macro(raw_unit))
+    return tree is not None and unit_tree_allowed(tree)
 
-    # allow power but not negative power so m^-1.
-    # Reason is there is no latex so 1/m is much clearer here
-    for u in units_with_powers:
-        if "^" in u:
-            base, expo = u.split("^")
-            if expo[:1] == "-":
-                return False
-            else:
-                units_with_powers = [base]
 
-    units = filter(None, units_with_powers)
-    return all(
-        u in allowed_non_prefixable_units or u in allowed_prefixable_units or is_prefixed_unit(u)
-        for u in units
-    )
+def unit_tree_allowed(tree):
+    """
+    This method checks that every part of a parsed unit expression is allowed
+    """
+    if tree == ("product", ()):
+        # Nothing but whitespace
+        return True
+    for node, is_numerator in iter_nodes(tree):
+        kind = node[0]
+        if kind == "unit":
+            unit = node[1]
+            if not (
+                unit in allowed_non_prefixable_units
+                or unit in allowed_prefixable_units
+                or is_prefixed_unit(unit)
+            ):
+                return False
+        elif kind == "number":
+            # 1 is ok as a unit as in 1/m but 1 on its own is not ok
+            if not (is_numerator and node[1] == "1"):
+                return False
+        elif kind == "power":
+            # allow power but not negative power so m^-1.
+            # Reason is there is no latex so 1/m is much clearer here
+            if node[2].startswith("-"):
+                return False
+        elif kind == "product" and not node[1]:
+            # Empty brackets or a missing side of a quotient
+            return False
+    return True
 
 
 def build_failure_message(basemessage, submessages):
@@ -174,139 +344,587 @@ def build_failure_message(basemessage, submessages):
     return "{}\n{}".format(basemessage, "\n".join("   -> " + s for s in submessages))
 
 
-def get_multiple_instances(db):
+class PvCheck:
     """
-    This method warns if there are multiple PVs with the same name in the
-    project
+    Base class for the checks run by run_pv_checks.
+
+    Each check declares the records it needs, so that the engine only routes matching
+    records to it using the db's indexes. A declaration of None places no restriction.
+        record_types: the record must be one of these types
+        info_names: the record must have one of these infos
+        field_names: the record must have one of these fields
     """
-    failures = []
-    dups = defaultdict(list)  # Makes a dict of lists
-    for rec in db.records:
-        dups[str(rec.pv)].append(rec)
 
-    for k, v in dups.items():
-        if len(v) > 1:
-            failures.append("Multiple instances of {}".format(k))
-    return failures
+    name: str
+    # Increase when a change to the check changes its results, so cached results are not used
+    version = 1
+    record_types: set[str] | None = None
+    info_names: set[str] | None = None
+    field_names: set[str] | None = None
+
+    def get_info_names(self, db):
+        """
+        This method returns the info names one of which a record must have to be routed to
+        this check. Override it if they depend on the db.
+        """
+        return self.info_names
+
+    def get_record_positions(self, db):
+        """
+        This method returns the positions of the records this check should visit, or None if
+        it should visit every record
+        """
+        info_names = self.get_info_names(db)
+        if self.record_types is None and info_names is None and self.field_names is None:
+            return None
+        return db.get_record_positions(self.record_types, info_names, self.field_names)
+
+
+class RecordCheck(PvCheck):
+    """
+    Base class for checks which look at each record on its own.
+    """
 
+    def check_record(self, rec, fields):
+        """
+        This method returns the failures for a single record.
 
-def get_multiple_properties_on_pvs(db):
+        Args:
+            rec: the record to check
+            fields: dict of field name to the first field of the record with that name
+        Returns:
+            list of failure messages
+        """
+        raise NotImplementedError()
+
+
+class DbCheck(PvCheck):
     """
-    This method checks that no PVs have duplicate fields
+    Base class for checks which need to see every record of a db before reporting.
+    The engine keeps an accumulator of the summaries returned for each record, and hands
+    it to finish once every record has been visited.
     """
-    failures = []
 
-    for rec in db.records:
-        fields = rec.get_field_names()
-        if len(set(fields)) != len(fields):
-            dupes = set([i for i in fields if fields.count(i) > 1])
-            dupe_vals = {rec.get_field(name).has_macro for name in dupes}
-            if not all(dupe_vals):
-                failures.append(
-                    "Multiple instances of fields {} on {}".format(",".join(dupes), rec)
-                )
-    return failures
+    def summarise(self, rec, fields):
+        """
+        This method returns what the check needs to know about a single record, or None if
+        the record is of no interest to the check.
+        """
+        raise NotImplementedError()
 
+    def finish(self, summaries):
+        """
+        This method returns the failures for the db.
 
-def get_interest_units(db):
+        Args:
+            summaries: list of (record, summary) for every record with a summary, in db order
+        Returns:
+            list of failure messages
+        """
+        raise NotImplementedError()
+
+
+# List of Errors to check for.
+check_error: list[PvCheck] = []
+# List of Warnings to check for.
+check_warning: list[PvCheck] = []
+
+
+def register_check(checks):
     """
-    This method checks that interesting PVs have units
+    Decorator which adds an instance of the decorated check class to the given list of checks
     """
-    failures = []
 
-    for rec in db.records:
-        if rec.is_interest() and not rec.is_disable() and (rec.get_type() in EGU_sub_list):
-            unit = rec.get_field_value("EGU")
-            if unit is None:
-                failures.append("Missing units on {}".format(rec))
-    return failures
+    def register(check_class):
+        checks.append(check_class())
+        return check_class
 
+    return register
 
-def get_interest_calc_readonly(db):
+
+def get_first_fields(rec):
     """
-    This method checks that interesting PVs that are calc fields are set to
-    readonly
+    This method returns a dict of field name to the first field of the record with that name
     """
-    failures = []
+    fields = {}
+    for field in rec.fields:
+        fields.setdefault(field.name, field)
+    return fields
 
-    for rec in db.records:
-        if rec.is_interest() and (rec.get_type() in ASG_list):
-            value = rec.get_field_value("ASG")
-            if value != "READONLY":
-                failures.append("Missing ASG on {}".format(rec))
-    return failures
 
+def get_duplicate_fields(rec):
+    """
+    This method finds the fields of a record which share a name with another of its fields
 
-def get_desc_length(db):
+    Returns:
+        dict of field name to a list of (position, has_macro) for every field with that name,
+        for names used by more than one field. Names are in order of first appearance.
     """
-    This method checks that the description length on all PVs is no longer
-    than 40 chars
+    positions = {}
+    for position, field in enumerate(rec.fields):
+        positions.setdefault(field.name, []).append((position, field.has_macro))
+    return {name: found for name, found in positions.items() if len(found) > 1}
+
+
+class CheckStats:
+    """
+    This class collects, for each file and check, the wall time spent in the check, the
+    number of records it visited and the number of failures it emitted. The hits and misses
+    of unit_verdicts (since the units were last configured) are reported with them.
+    """
+
+    def __init__(self):
+        # filename -> check name -> [seconds, records, failures]
+        self.files = {}
+
+    def add(self, filename, check_name, seconds, records, failures):
+        counts = self.files.setdefault(filename, {}).setdefault(check_name, [0.0, 0, 0])
+        counts[0] += seconds
+        counts[1] += records
+        counts[2] += failures
+
+    def get_totals(self):
+        """
+        This method returns the counts of each check summed over every file
+        """
+        totals = {}
+        for checks in self.files.values():
+            for check_name, counts in checks.items():
+                total = totals.setdefault(check_name, [0.0, 0, 0])
+                for index, count in enumerate(counts):
+                    total[index] += count
+        return totals
+
+    def to_dict(self):
+        def as_dict(checks):
+            return {
+                check_name: {"seconds": seconds, "records": records, "failures": failures}
+                for check_name, (seconds, records, failures) in checks.items()
+            }
+
+        return {
+            "files": {filename: as_dict(checks) for filename, checks in self.files.items()},
+            "totals": as_dict(self.get_totals()),
+            "unit_verdicts": {"hits": unit_verdicts.hits, "misses": unit_verdicts.misses},
+        }
+
+    def write(self, path):
+        """
+        This method writes the statistics to a JSON file
+        """
+        with open(path, "w") as stats_file:
+            json.dump(self.to_dict(), stats_file, indent=2)
+
+
+def timed(visit, counts):
+    """
+    This method wraps a check's visit method so that it adds its time and number of calls to
+    counts
     """
-    failures = []
 
-    for rec in db.records:
-        desc = rec.get_field_value("DESC")
-        if desc is not None:
-            # remove macros
-            desc = re.sub(r"\$\([^)]*\)", "", desc)
-            if len(desc) > 40:
-                failures.append("Description too long on {}".format(rec))
-    return failures
+    def timed_visit(rec, fields):
+        start = time.perf_counter()
+        try:
+            return visit(rec, fields)
+        finally:
+            counts[0] += time.perf_counter() - start
+            counts[1] += 1
 
+    return timed_visit
 
-def get_units_valid(db):
+
+class CheckResultCache:
     """
-    This method loops through all found records and finds the unique units.
-    It then checks these units are standard
+    This class caches the result of each check on each record, keyed on the record's content,
+    the check's name and version and the rules in use (see rules_digest), so that only changed
+    records are checked again. For a DbCheck the record's summary is cached and finish is
+    still run on every db.
+    Cached results must be cleared if the rules are changed other than by configure_units or
+    configure_rules. The cache can be saved to a file and loaded by a later run; only the
+    results used since the cache was created or loaded are saved.
     """
-    failures = []
 
-    for rec in db.records:
-        unit = rec.get_field_value("EGU")
+    # Increase when the format of the saved cache changes
+    FORMAT = 2
+
+    def __init__(self):
+        # (record key, check name, check version, rules digest) -> result
+        self.results = {}
+        # The keys looked up or added since the cache was created
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.results)
+
+    def clear(self):
+        self.results.clear()
+        self.used.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def wrap(self, visit, check, record_keys=None):
+        """
+        This method wraps a check's visit method so that its results are looked up in and
+        added to the cache. Wrappers given the same record_keys dict share the key computed
+        for each record, which is only valid while the records are alive.
+        """
+        results = self.results
+        used = self.used
+        name, version, rules = check.name, check.version, rules_digest
+        if record_keys is None:
+            record_keys = {}
+
+        def cached_visit(rec, fields):
+            # Each record's key is computed once for all the wrappers sharing record_keys
+            record_key = record_keys.get(id(rec))
+            if record_key is None:
+                record_key = rec.get_ordered_fingerprint()
+                record_keys[id(rec)] = record_key
+            key = (record_key, name, version, rules)
+            used.add(key)
+            if key in results:
+                self.hits += 1
+                return results[key]
+            self.misses += 1
+            result = visit(rec, fields)
+            results[key] = result
+            return result
+
+        return cached_visit
+
+    def save(self, path):
+        """
+        This method writes the results used in this run to a file, dropping any others
+        """
+        results = [list(key) + [self.results[key]] for key in self.used if key in self.results]
+        # Write to a temporary file first so an interrupted run never leaves a partial file
+        temporary_file = "{}.{}".format(path, os.getpid())
+        with open(temporary_file, "w") as cache_file:
+            json.dump({"format": self.FORMAT, "results": results}, cache_file)
+        os.replace(temporary_file, path)
+
+    def load(self, path):
+        """
+        This method adds the results saved in a file to the cache. Files which are missing,
+        unreadable or in an old format are ignored.
+        """
+        try:
+            with open(path) as cache_file:
+                saved = json.load(cache_file)
+            if saved["format"] != self.FORMAT:
+                return
+            results = {
+                (record_key, name, version, rules): result
+                for record_key, name, version, rules, result in saved["results"]
+            }
+        except (OSError, ValueError, TypeError, KeyError):
+            return
+        self.results.update(results)
+
+
+def run_checks(db, checks, stats=None, filename=None, cache=None):
+    """
+    This method runs the given checks over the db in a single pass over its records.
+    Each record is only handed to the checks whose declared prerequisites it matches.
 
-        if unit is None or unit == "" or allowed_unit(unit):
-            continue
+    Args:
+        db: the db to check
+        checks: list of RecordCheck and DbCheck instances
+        stats: optional CheckStats to add the cost of each check to. Checks are only timed
+            if this is given.
+        filename: the filename to record the stats against, defaults to the db's directory
+        cache: optional CheckResultCache to look up and store the result of each check on
+            each record in
+    Returns:
+        list of the failures of each check, in the same order as the checks
+    """
+    results = [[] for _ in checks]
+    # [seconds, records] for each check, if collecting stats
+    counts = [[0.0, 0] for _ in checks]
+    # Handlers for checks which visit every record, and for checks routed to specific records
+    every_record = []
+    routes = defaultdict(list)
+    # The cache key of each record, computed once for all the checks
+    record_keys = {}
+    for check, result, check_counts in zip(checks, results, counts):
+        if isinstance(check, RecordCheck):
+            visit, is_summary = check.check_record, False
+        else:
+            visit, is_summary = check.summarise, True
+        if cache is not None:
+            visit = cache.wrap(visit, check, record_keys)
+        if stats is not None:
+            visit = timed(visit, check_counts)
+        handler = (visit, result, is_summary)
+        positions = check.get_record_positions(db)
+        if positions is None:
+            every_record.append(handler)
         else:
-            failures.append("Invalid unit '{}' on {}".format(unit, rec))
+            for position in positions:
+                routes[position].append(handler)
 
-    return failures
+    records = db.records
+    if every_record:
+        positions = range(len(records))
+    else:
+        positions = sorted(routes)
+
+    for position in positions:
+        rec = records[position]
+        fields = get_first_fields(rec)
+        for handlers in (every_record, routes.get(position, ())):
+            for visit, result, is_summary in handlers:
+                if is_summary:
+                    summary = visit(rec, fields)
+                    if summary is not None:
+                        result.append((rec, summary))
+                else:
+                    result.extend(visit(rec, fields))
+
+    for index, check in enumerate(checks):
+        if isinstance(check, DbCheck):
+            start = time.perf_counter()
+            results[index] = check.finish(results[index])
+            counts[index][0] += time.perf_counter() - start
+
+    if stats is not None:
+        if filename is None:
+            filename = str(db)
+        for check, result, (seconds, records) in zip(checks, results, counts):
+            stats.add(filename, check.name, seconds, records, len(result))
+    return results
+
+
+def run_check(db, check):
+    """
+    This method runs a single check over the db and returns its failures
+    """
+    return run_checks(db, [check])[0]
 
 
-def get_interest_descriptions(db):
+@register_check(check_error)
+class InterestDescriptionsCheck(RecordCheck):
     """
-    This method checks all records marked as interesting for description fields
+    This check checks all records marked as interesting for description fields
     """
-    failures = []
 
-    for rec in db.records:
-        if rec.is_interest() and not rec.has_field("DESC"):
-            failures.append("Missing description on {}".format(rec))
-    return failures
+    name = "interest_descriptions"
+    info_names = {"INTEREST"}
 
+    def check_record(self, rec, fields):
+        if "DESC" not in fields:
+            return ["Missing description on {}".format(rec)]
+        return []
 
-def get_log_info_tags(db):
+
+@register_check(check_error)
+class UnitsValidCheck(RecordCheck):
     """
-    This method checks logging records to check that logging tags are not
+    This check finds the units of each record and checks these units are standard
+    """
+
+    name = "units_valid"
+    field_names = {"EGU"}
+
+    def check_record(self, rec, fields):
+        unit = fields["EGU"].value
+        if unit == "" or allowed_unit(unit):
+            return []
+        return ["Invalid unit '{}' on {}".format(unit, rec)]
+
+
+@register_check(check_error)
+class DescLengthCheck(RecordCheck):
+    """
+    This check checks that the description length on all PVs is no longer
+    than desc_max_length (40 by default) chars
+    """
+
+    name = "desc_length"
+    field_names = {"DESC"}
+
+    def check_record(self, rec, fields):
+        # remove macros
+        if len(_MACRO.sub("", fields["DESC"].value)) > desc_max_length:
+            return ["Description too long on {}".format(rec)]
+        return []
+
+
+@register_check(check_error)
+class InterestCalcReadonlyCheck(RecordCheck):
+    """
+    This check checks that interesting PVs that are calc fields are set to
+    readonly
+    """
+
+    name = "interest_calc_readonly"
+    info_names = {"INTEREST"}
+
+    @property
+    def record_types(self):
+        return ASG_list
+
+    def check_record(self, rec, fields):
+        asg = fields.get("ASG")
+        if asg is None or asg.value != "READONLY":
+            return ["Missing ASG on {}".format(rec)]
+        return []
+
+
+@register_check(check_error)
+class InterestUnitsCheck(RecordCheck):
+    """
+    This check checks that interesting PVs have units
+    """
+
+    name = "interest_units"
+    info_names = {"INTEREST"}
+
+    @property
+    def record_types(self):
+        return EGU_sub_list
+
+    def check_record(self, rec, fields):
+        if not rec.is_disable() and "EGU" not in fields:
+            return ["Missing units on {}".format(rec)]
+        return []
+
+
+@register_check(check_error)
+class MultiplePropertiesCheck(RecordCheck):
+    """
+    This check checks that no PVs have duplicate fields
+    """
+
+    name = "multiple_properties"
+
+    def check_record(self, rec, fields):
+        # fields only holds the first field of each name, so records without duplicates
+        # are ruled out without counting
+        if len(fields) != len(rec.fields):
+            dupes = get_duplicate_fields(rec)
+            # Duplicates are allowed if the first instance is set by a macro
+            if not all(found[0][1] for found in dupes.values()):
+                return ["Multiple instances of fields {} on {}".format(",".join(dupes), rec)]
+        return []
+
+
+@register_check(check_error)
+class LogInfoTagsCheck(DbCheck):
+    """
+    This check checks logging records to check that logging tags are not
     repeated and that the period is not defined in two ways.
     """
-    failures = []
 
-    # This originally was trying to check for duplicate logs etc.
-    # across multiple files simultaneously, but was failing possible future change?
+    name = "log_info_tags"
 
-    log_fields = {}
-    logging_period = None
+    # This only checks within a single db. Conflicts between the files of a project are
+    # found by get_log_info_tags_across_files in src.project_checks.
 
-    for rec in db.records:
+    def get_info_names(self, db):
+        return {name for name in db.get_info_names() if name.lower().strip('"').startswith("log")}
+
+    def summarise(self, rec, fields):
+        log_infos = []
         for info in rec.infos:
             info_name = info.name.lower().strip('"')
-            info_value = info.value
             if info_name.startswith("log"):
+                log_infos.append((info_name, info.value))
+        return log_infos
+
+    def finish(self, summaries):
+        failures = []
+        log_fields = {}
+        logging_period = None
+        for rec, log_infos in summaries:
+            for info_name, info_value in log_infos:
                 check_repeated_log(failures, info_name, info_value, log_fields, rec)
                 logging_period = check_changed_period(
                     failures, info_name, info_value, logging_period, rec
                 )
-    return failures
+        return failures
+
+
+@register_check(check_warning)
+class MultipleInstancesCheck(DbCheck):
+    """
+    This check warns if there are multiple PVs with the same name in the
+    project
+    """
+
+    name = "multiple_instances"
+
+    def summarise(self, rec, fields):
+        return str(rec.pv)
+
+    def finish(self, summaries):
+        dups = defaultdict(list)  # Makes a dict of lists
+        for rec, name in summaries:
+            dups[name].append(rec)
+        return ["Multiple instances of {}".format(k) for k, v in dups.items() if len(v) > 1]
+
+
+def get_multiple_instances(db):
+    """
+    This method warns if there are multiple PVs with the same name in the
+    project
+    """
+    return run_check(db, MultipleInstancesCheck())
+
+
+def get_multiple_properties_on_pvs(db):
+    """
+    This method checks that no PVs have duplicate fields
+    """
+    return run_check(db, MultiplePropertiesCheck())
+
+
+def get_interest_units(db):
+    """
+    This method checks that interesting PVs have units
+    """
+    return run_check(db, InterestUnitsCheck())
+
+
+def get_interest_calc_readonly(db):
+    """
+    This method checks that interesting PVs that are calc fields are set to
+    readonly
+    """
+    return run_check(db, InterestCalcReadonlyCheck())
+
+
+def get_desc_length(db):
+    """
+    This method checks that the description length on all PVs is no longer
+    than desc_max_length (40 by default) chars
+    """
+    return run_check(db, DescLengthCheck())
+
+
+def get_units_valid(db):
+    """
+    This method loops through all found records and finds the unique units.
+    It then checks these units are standard
+    """
+    return run_check(db, UnitsValidCheck())
+
+
+def get_interest_descriptions(db):
+    """
+    This method checks all records marked as interesting for description fields
+    """
+    return run_check(db, InterestDescriptionsCheck())
+
+
+def get_log_info_tags(db):
+    """
+    This method checks logging records to check that logging tags are not
+    repeated and that the period is not defined in two ways.
+    """
+    return run_check(db, LogInfoTagsCheck())
 
 
 def check_changed_period(failures, info_name, info_value, logging_period, rec):
@@ -334,28 +952,41 @@ def check_repeated_log(failures, info_name, info_value, log_fields, rec):
         log_fields[info_name] = info_value
 
 
-# List of Errors to check for.
-check_error = [
-    get_interest_descriptions,
-    get_units_valid,
-    get_desc_length,
-    get_interest_calc_readonly,
-    get_interest_units,
-    get_multiple_properties_on_pvs,
-    get_log_info_tags,
-]
-# List of Warnings to check for.
-check_warning = [get_multiple_instances]
-
+def select_checks(only=None, skip=None):
+    """
+    This method returns the names of the registered checks to run, in the order they are
+    registered.
 
-def run_pv_checks(db):
+    Args:
+        only: if given, the names of the only checks to run
+        skip: if given, the names of checks not to run
+    Raises:
+        ValueError: if a name is not the name of a registered check
+    """
+    names = [check.name for check in check_error + check_warning]
+    unknown = [name for name in (only or []) + (skip or []) if name not in names]
+    if unknown:
+        raise ValueError("Unknown checks: {}".format(", ".join(unknown)))
+    if only is not None:
+        names = [name for name in names if name in only]
+    if skip is not None:
+        names = [name for name in names if name not in skip]
+    return names
+
+
+def run_pv_checks(db, stats=None, filename=None, cache=None, checks=None):
     """
     This method runs through the checks and returns the all warnings and errors.
+    All checks are run in a single pass over the records. If a CheckStats is given, the cost
+    of each check is added to it under filename. If a CheckResultCache is given, only records
+    without cached results are checked. If the names of checks are given, only those checks
+    are run (see select_checks).
     """
-    errors = []
-    warnings = []
-    for check in check_error:
-        errors.extend(check(db))
-    for check in check_warning:
-        warnings.extend(check(db))
+    error_checks, warning_checks = check_error, check_warning
+    if checks is not None:
+        error_checks = [check for check in check_error if check.name in checks]
+        warning_checks = [check for check in check_warning if check.name in checks]
+    results = run_checks(db, error_checks + warning_checks, stats, filename, cache)
+    errors = [failure for failures in results[: len(error_checks)] for failure in failures]
+    warnings = [failure for failures in results[len(error_checks) :] for failure in failures]
     return warnings, errors
@@ -0,0 +1,109 @@
+"""
+This file loads the rule tables used by the pv checks from a JSON config file.
+
+The config is an object with any of the keys below. Keys which are left out keep the values
+currently used by pv_checks, which are the built-in ones unless rules have been configured.
+    EGU_list              record types that should have an EGU field
+    EGU_sub_list          record types whose units are checked if they are interesting
+    ASG_list              record types that should have an ASG defined if interesting
+    prefixable_units      units which may be used on their own or with a prefix
+    unit_prefixes         the prefixes allowed on prefixable units
+    non_prefixable_units  units which may only be used on their own
+    standalone_units      whole unit strings which are allowed as they are
+    desc_max_length       the maximum length of a DESC field, ignoring macros
+
+A config is compiled into the sets the checks look up, including every prefixed unit. This
+only takes a few hundred set insertions, so it is done every time the config is loaded.
+"""
+
+import json
+
+import src.pv_checks as pv
+
+SET_KEYS = (
+    "EGU_list",
+    "EGU_sub_list",
+    "ASG_list",
+    "prefixable_units",
+    "unit_prefixes",
+    "non_prefixable_units",
+    "standalone_units",
+)
+
+
+class RulesError(ValueError):
+    """
+    Error that gets raised if a rules config is not valid.
+    """
+
+
+def get_default_config():
+    """
+    This method returns a config holding the rules currently used by pv_checks
+    """
+    return {
+        "EGU_list": sorted(pv.EGU_list),
+        "EGU_sub_list": sorted(pv.EGU_sub_list),
+        "ASG_list": sorted(pv.ASG_list),
+        "prefixable_units": sorted(pv.allowed_prefixable_units),
+        "unit_prefixes": sorted(pv.allowed_unit_prefixes),
+        "non_prefixable_units": sorted(pv.allowed_non_prefixable_units),
+        "standalone_units": sorted(pv.allowed_standalone_units),
+        "desc_max_length": pv.desc_max_length,
+    }
+
+
+class Rules:
+    """
+    This class holds a rules config compiled into the structures used by the checks
+    """
+
+    def __init__(self, config):
+        unknown = set(config) - set(SET_KEYS) - {"desc_max_length"}
+        if unknown:
+            raise RulesError("Unknown rules: {}".format(", ".join(sorted(unknown))))
+        merged = get_default_config()
+        merged.update(config)
+        for key in SET_KEYS:
+            values = merged[key]
+            if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+                raise RulesError("Rule {} must be a list of strings".format(key))
+            setattr(self, key, frozenset(values))
+        self.desc_max_length = merged["desc_max_length"]
+        # bool is a subclass of int, but true and false are not lengths
+        if (
+            not isinstance(self.desc_max_length, int)
+            or isinstance(self.desc_max_length, bool)
+            or self.desc_max_length < 0
+        ):
+            raise RulesError("Rule desc_max_length must be a non-negative integer")
+        self.prefixed_units = pv.build_prefixed_units(self.unit_prefixes, self.prefixable_units)
+
+
+def compile_rules(contents):
+    """
+    This method compiles the contents of a rules config file
+
+    Args:
+        contents: the bytes of the config file
+    Returns:
+        the compiled Rules
+    """
+    try:
+        config = json.loads(contents)
+    except ValueError as e:
+        raise RulesError("Rules config is not valid JSON: {}".format(e))
+    if not isinstance(config, dict):
+        raise RulesError("Rules config must be a JSON object")
+    return Rules(config)
+
+
+def load_rules(path):
+    """
+    This method loads and compiles the rules config at path
+
+    Returns:
+        the compiled Rules
+    """
+    with open(path, "rb") as config_file:
+        return compile_rules(config_file.read())
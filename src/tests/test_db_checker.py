@@ -1,10 +1,16 @@
 import unittest
 
 import src.db_checker as checker
-from src.db_parser.epics_collections import Record
+from src.db_parser.epics_collections import Project, Record
+from src.db_parser.lexer import Lexer
+from src.db_parser.parser import Parser
 from src.grouper import RecordGroup
 
 
+def parse(text):
+    return Parser(Lexer(text)).db()
+
+
 class TestDbChecker(unittest.TestCase):
     def test_empty(self):
         self.assertIsNotNone(checker.DbChecker("", ""))
@@ -254,3 +260,69 @@ class TestDbCheckerWithRecords(unittest.TestCase):
         db.check_sp_formatting(":SP", self.test_group, self.test_group.SP)
 
         self.assertFalse(db.catch)
+
+    def test_find_name_errors(self):
+        case_errors, char_errors = checker.DbChecker("", "").find_name_errors(
+            ["GOOD", "$(P):lower", "$(P):BAD-CHAR", "bad-both"]
+        )
+        self.assertSetEqual(case_errors, {"$(P):lower", "bad-both"})
+        self.assertDictEqual(char_errors, {"$(P):BAD-CHAR": "BAD-CHAR", "bad-both": "bad-both"})
+
+    def test_check_group(self):
+        db = checker.DbChecker("", "")
+        db.records_dict = self.record_dict
+        self.test_group.RB = "TEST"
+        self.test_group.SP = "TEST:SP"
+        self.test_group.SP_RBV = "TEST:SP:rbv"
+
+        db.check_group(self.test_group)
+
+        self.assertListEqual(db.warnings, ["CASING ERROR: TEST:SP:rbv should be upper-case"])
+        self.assertListEqual(
+            db.catch, ["FORMAT ERROR: TEST does not have a correctly formatted :SP:RBV"]
+        )
+
+
+class TestProjectChecker(unittest.TestCase):
+    a_db = 'record(ao, "$(P)TEMP:SP") {}\nrecord(ai, "$(P)TEMP") {}'
+
+    def test_groups_across_files(self):
+        project = Project()
+        project.add_db("a.db", parse(self.a_db))
+        project.add_db("b.db", parse('alias("$(P)TEMP:SP", "$(P)TEMP:SP:RBV")'))
+        warnings, errors = checker.ProjectChecker(project, "project", True).syntax_check()
+        self.assertListEqual(errors, [])
+
+    def test_alias_from_other_file_not_used_by_file_check(self):
+        a_db = parse(self.a_db)
+        project = Project()
+        project.add_db("a.db", a_db)
+        project.add_db("b.db", parse('alias("$(P)TEMP:SP", "$(P)TEMP:SP:RBV")'))
+        warnings, errors = checker.ProjectChecker(project, "project", True).syntax_check()
+        self.assertListEqual(errors, [])
+
+        warnings, errors = checker.DbChecker(a_db, "a.db", True).syntax_check()
+        self.assertListEqual(errors, ["PARAMETER ERROR: $(P)TEMP has a :SP but not a :SP:RBV"])
+
+    def test_missing_readback(self):
+        project = Project()
+        project.add_db("a.db", parse(self.a_db))
+        warnings, errors = checker.ProjectChecker(project, "project", True).syntax_check()
+        self.assertListEqual(errors, ["PARAMETER ERROR: $(P)TEMP has a :SP but not a :SP:RBV"])
+
+    def test_project_check(self):
+        project = Project()
+        project.add_db("a.db", parse('record(ai, "$(P)TEMP") {}'))
+        project.add_db("b.db", parse('record(ai, "$(P)TEMP") {}'))
+        warnings, errors = checker.ProjectChecker(project, "project").project_check()
+        self.assertListEqual(warnings, ["Multiple instances of $(P)TEMP in a.db, b.db"])
+        self.assertListEqual(errors, [])
+
+    def test_syntax_check_selected_files(self):
+        project = Project()
+        project.add_db("a.db", parse(self.a_db))
+        project.add_db("b.db", parse('record(ai, "$(P)lower") {}'))
+        checker_a = checker.ProjectChecker(project, "project", True, {"a.db"})
+        warnings, errors = checker_a.syntax_check()
+        self.assertEqual(warnings, 0)
+        self.assertListEqual(errors, ["PARAMETER ERROR: $(P)TEMP has a :SP but not a :SP:RBV"])
@@ -2,6 +2,7 @@ import unittest
 
 import src.db_parser.epics_collections as ec
 import src.grouper as g
+from src.names import SP, SP_RBV
 
 
 class GrouperTest(unittest.TestCase):
@@ -156,3 +157,63 @@ class GrouperTest(unittest.TestCase):
         self.assertEqual(grouper.record_groups[tempalias].main, tempalias)
         self.assertEqual(grouper.record_groups[tempalias].SP, "TEMPALIAS:SP")
         self.assertEqual(grouper.record_groups[tempalias].SP_RBV, "TEMPALIAS:SP:RBV")
+
+    def test_split_name(self):
+        self.assertEqual(g.split_name("TEMP"), ("TEMP", None))
+        self.assertEqual(g.split_name("TEMP:SP"), ("TEMP", SP))
+        self.assertEqual(g.split_name("TEMP_SETPOINT:READBACK"), ("TEMP", SP_RBV))
+        self.assertEqual(g.split_name(":SP"), (":SP", None))
+
+    def test_group_records_key_with_own_stem(self):
+        # A:SP:SP makes a group with key A:SP, whose own stem is A, so it collects the names
+        # with stem A
+        names = ["A", "A:SP", "A:SP:SP", "A:SP:SP:RBV"]
+        grouper = g.Grouper()
+        grouper.group_records({name: ec.Record("type", name, [], [], []) for name in names})
+
+        self.assertListEqual(list(grouper.record_groups), ["A", "A:SP"])
+        self.assertListEqual(grouper.record_groups["A"].get_all(), ["A", "A:SP", ""])
+        self.assertEqual(grouper.record_groups["A:SP"].main, "A:SP:SP")
+        self.assertListEqual(grouper.record_groups["A:SP"].get_all(), ["", "A:SP", ""])
+
+    def test_incremental_grouper_matches_group_records(self):
+        grouper = g.IncrementalGrouper()
+        grouper.group_records(self.record_dict)
+        grouper.add_record("TEMPALIAS", ["TEMPALIAS:SP", "TEMPALIAS:SP:RBV"])
+        grouper.remove_record("NOTTEMP")
+
+        record_dict = {
+            name: record for name, record in self.record_dict.items() if name != "NOTTEMP"
+        }
+        record_dict["TEMPALIAS"] = ec.Record(
+            "type", "TEMPALIAS", [], [], ["TEMPALIAS:SP", "TEMPALIAS:SP:RBV"]
+        )
+        expected = g.Grouper().group_records(record_dict)
+        self.assertListEqual(list(grouper.get_groups()), list(expected))
+        for key, group in grouper.get_groups().items():
+            self.assertListEqual(group.get_all(), expected[key].get_all())
+            self.assertEqual(group.main, expected[key].main)
+
+    def test_incremental_grouper_reports_changed_groups(self):
+        grouper = g.IncrementalGrouper()
+        grouper.group_records(self.record_dict)
+
+        self.assertSetEqual(grouper.add_record("OTHER"), {"OTHER"})
+        self.assertSetEqual(grouper.add_record("NOTTEMP:SP"), {"NOTTEMP"})
+        self.assertEqual(grouper.record_groups["NOTTEMP"].SP, "NOTTEMP:SP")
+        self.assertSetEqual(grouper.set_aliases("OTHER", ["OTHER:SP"]), {"OTHER"})
+        self.assertSetEqual(grouper.set_aliases("OTHER", ["OTHER:SP"]), set())
+        self.assertSetEqual(grouper.remove_record("TEMP"), {"TEMP"})
+        self.assertEqual(grouper.record_groups["TEMP"].main, "TEMP:SP")
+        self.assertSetEqual(grouper.remove_record("TEMP"), set())
+
+    def test_incremental_grouper_removes_empty_groups(self):
+        grouper = g.IncrementalGrouper()
+        grouper.group_records(self.record_dict)
+        grouper.remove_record("NOTTEMP")
+        self.assertSetEqual(grouper.remove_record("NOTTEMP:SP:RBV"), {"NOTTEMP"})
+        self.assertNotIn("NOTTEMP", grouper.record_groups)
+
+    def test_incremental_grouper_set_aliases_of_unknown_record(self):
+        with self.assertRaises(KeyError):
+            g.IncrementalGrouper().set_aliases("TEMP", [])
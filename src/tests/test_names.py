@@ -0,0 +1,45 @@
+import unittest
+
+import src.names as names
+
+
+class NamesTest(unittest.TestCase):
+    def test_plain_name(self):
+        info = names.analyse_name("TEMP")
+        self.assertFalse(info.has_macro)
+        self.assertEqual(info.macro, "")
+        self.assertEqual(info.base, "TEMP")
+        self.assertEqual(info.stem, "TEMP")
+        self.assertIsNone(info.kind)
+        self.assertIsNone(info.separator)
+
+    def test_setpoint_readback_with_macro(self):
+        info = names.analyse_name("$(P):TEMP_SP:RBV")
+        self.assertTrue(info.has_macro)
+        self.assertEqual(info.macro, "$(P)")
+        self.assertEqual(info.base, ":TEMP_SP:RBV")
+        self.assertEqual(info.stem, "$(P):TEMP")
+        self.assertEqual(info.kind, names.SP_RBV)
+        self.assertEqual(info.separator, "_")
+        self.assertEqual(info.without_macro(), "TEMP_SP:RBV")
+        self.assertEqual(info.without_macro(False), ":TEMP_SP:RBV")
+
+    def test_setpoint(self):
+        info = names.analyse_name("$(P)TEMP:SETPOINT")
+        self.assertEqual(info.stem, "$(P)TEMP")
+        self.assertEqual(info.kind, names.SP)
+        self.assertEqual(info.separator, ":")
+
+    def test_suffix_needs_a_stem(self):
+        self.assertIsNone(names.analyse_name(":SP").kind)
+        self.assertEqual(names.analyse_name("$(P):SP").stem, "$(P)")
+
+    def test_macro_prefix_ends_at_last_bracket(self):
+        info = names.analyse_name("$(P)A(B):SP")
+        self.assertEqual(info.macro, "$(P)A(B)")
+        self.assertEqual(info.stem, "$(P)A(B)")
+        self.assertEqual(names.analyse_name("$(P").macro, "")
+        self.assertEqual(names.analyse_name("A(B)").macro, "")
+
+    def test_results_are_cached(self):
+        self.assertIs(names.analyse_name("TEMP:SP"), names.analyse_name("TEMP:SP"))
@@ -0,0 +1,142 @@
+import unittest
+
+import src.db_parser.epics_collections as ec
+import src.project_checks as pc
+from src.db_parser.lexer import Lexer
+from src.db_parser.parser import Parser
+
+
+def parse(text):
+    return Parser(Lexer(text)).db()
+
+
+class ProjectTest(unittest.TestCase):
+    def test_alias_resolved_across_files(self):
+        project = ec.Project()
+        project.add_db("a.db", parse('alias("$(P)TEMP:SP", "$(P)TEMP:SP:RBV")'))
+        self.assertEqual(len(project.get_unresolved_aliases()), 1)
+
+        project.add_db("b.db", parse('record(ao, "$(P)TEMP:SP") {}'))
+
+        self.assertListEqual(project.get_unresolved_aliases(), [])
+        (filename, rec) = project.find("$(P)TEMP:SP:RBV")[0]
+        self.assertEqual(filename, "b.db")
+        self.assertEqual(rec.pv, "$(P)TEMP:SP")
+        self.assertListEqual(project.get_aliases(filename, rec), ["$(P)TEMP:SP:RBV"])
+
+    def test_alias_across_files_leaves_record_unchanged(self):
+        project = ec.Project()
+        db = parse('record(ao, "$(P)TEMP:SP") {}')
+        project.add_db("b.db", db)
+        project.add_db("a.db", parse('alias("$(P)TEMP:SP", "$(P)TEMP:SP:RBV")'))
+
+        self.assertListEqual(db.records[0].aliases, [])
+
+    def test_alias_resolved_to_record_already_added(self):
+        project = ec.Project()
+        project.add_db("b.db", parse('record(ao, "$(P)TEMP:SP") {}'))
+        project.add_db("a.db", parse('alias("$(P)TEMP:SP", "$(P)TEMP:SP:RBV")'))
+
+        self.assertListEqual(project.get_unresolved_aliases(), [])
+        self.assertEqual(project.find("$(P)TEMP:SP:RBV")[0][1].pv, "$(P)TEMP:SP")
+
+    def test_alias_of_alias_resolved_across_files(self):
+        project = ec.Project()
+        project.add_db("a.db", parse('alias("$(P)B", "$(P)C")'))
+        project.add_db("b.db", parse('alias("$(P)A", "$(P)B")'))
+        project.add_db("c.db", parse('record(ao, "$(P)A") {}'))
+
+        self.assertListEqual(project.get_unresolved_aliases(), [])
+        self.assertEqual(project.find("$(P)C")[0][1].pv, "$(P)A")
+
+    def test_adding_a_file_twice_is_rejected(self):
+        project = ec.Project()
+        project.add_db("a.db", parse('record(ai, "$(P)A") {}'))
+        with self.assertRaises(ValueError):
+            project.add_db("a.db", parse('record(ai, "$(P)B") {}'))
+        self.assertListEqual(list(project.pv_index), ["$(P)A"])
+
+
+class ProjectChecksTest(unittest.TestCase):
+    def test_multiple_instances_across_files(self):
+        project = ec.Project()
+        project.add_db("a.db", parse('record(ai, "$(P)TEMP") {}\nrecord(ai, "$(P)ONCE") {}'))
+        project.add_db("b.db", parse('record(ai, "$(P)TEMP") {}'))
+
+        self.assertListEqual(
+            pc.get_multiple_instances_across_files(project),
+            ["Multiple instances of $(P)TEMP in a.db, b.db"],
+        )
+
+    def test_multiple_instances_in_one_file_not_reported(self):
+        project = ec.Project()
+        project.add_db("a.db", parse('record(ai, "$(P)TEMP") {}\nrecord(ai, "$(P)TEMP") {}'))
+
+        self.assertListEqual(pc.get_multiple_instances_across_files(project), [])
+
+    def test_alias_clashes_with_record(self):
+        project = ec.Project()
+        project.add_db("a.db", parse('record(ai, "$(P)A") { alias("$(P)B") }'))
+        project.add_db("b.db", parse('record(ai, "$(P)B") {}'))
+
+        self.assertListEqual(
+            pc.get_alias_clashes(project), ["Alias $(P)B of $(P)A is also a record in b.db"]
+        )
+
+    def test_alias_used_for_multiple_records(self):
+        project = ec.Project()
+        project.add_db("a.db", parse('record(ai, "$(P)A") { alias("$(P)C") }'))
+        project.add_db("b.db", parse('record(ai, "$(P)B") { alias("$(P)C") }'))
+
+        self.assertListEqual(
+            pc.get_alias_clashes(project),
+            ["Alias $(P)C is used for multiple records: $(P)A, $(P)B"],
+        )
+
+    def test_unresolved_aliases(self):
+        project = ec.Project()
+        project.add_db("a.db", parse('alias("$(P)A", "$(P)B")'))
+
+        self.assertListEqual(
+            pc.get_unresolved_aliases(project),
+            ["Alias $(P)B in a.db refers to $(P)A which is not in the project"],
+        )
+
+    def test_log_info_tags_across_files(self):
+        project = ec.Project()
+        project.add_db(
+            "a.db",
+            parse('record(ai, "$(P)A") {info(log_header1, "A") info(log_period_seconds, "1")}'),
+        )
+        project.add_db(
+            "b.db",
+            parse('record(ai, "$(P)B") {info(log_header1, "B") info(log_period_pv, "X")}'),
+        )
+
+        self.assertListEqual(
+            pc.get_log_info_tags_across_files(project),
+            [
+                "Invalid logging config: $(P)B repeats the log info tag log_header1",
+                "Invalid logging config: $(P)B alters the logging period type",
+            ],
+        )
+
+    def test_log_info_tags_across_files_ignores_conflicts_within_a_file(self):
+        project = ec.Project()
+        project.add_db(
+            "a.db",
+            parse(
+                'record(ai, "$(P)A") {info(log_header1, "A") info(log_period_seconds, "1")}\n'
+                'record(ai, "$(P)B") {info(log_header1, "B") info(log_period_pv, "X")}'
+            ),
+        )
+        project.add_db("b.db", parse('record(ai, "$(P)C") {info(log_header2, "C")}'))
+
+        self.assertListEqual(pc.get_log_info_tags_across_files(project), [])
+
+    def test_run_project_checks_no_failures(self):
+        project = ec.Project()
+        project.add_db("a.db", parse('record(ai, "$(P)A") {}'))
+        project.add_db("b.db", parse('record(ai, "$(P)B") {}'))
+
+        self.assertEqual(pc.run_project_checks(project), ([], []))
@@ -1,9 +1,28 @@
+import os
+import tempfile
 import unittest
 
 import src.db_parser.epics_collections as ec
 import src.pv_checks as pv
 
 
+class CountingCheck(pv.RecordCheck):
+    """
+    This check fails every record it is given, keeping the names of the records in visited
+    """
+
+    name = "counting"
+
+    def __init__(self, record_types=None, info_names=None):
+        self.record_types = record_types
+        self.info_names = info_names
+        self.visited = []
+
+    def check_record(self, rec, fields):
+        self.visited.append(rec.pv)
+        return ["Checked {}".format(rec)]
+
+
 class PvChecksTest(unittest.TestCase):
     record_name_list = ["record1", "record2", "record3", "record4", "record5"]
     record_list = [
@@ -29,6 +48,10 @@ class PvChecksTest(unittest.TestCase):
         self.assertTrue(pv.allowed_unit("cdeg/ss"))
         self.assertTrue(pv.allowed_unit("uA hour"))
 
+    def test_allowed_unit_touching_units(self):
+        for unit in ["%%", "%mA", "%K"]:
+            self.assertFalse(pv.allowed_unit(unit), unit)
+
     def test_allowed_unit_over(self):
         # check properly handles unit over other unit
         self.assertTrue(pv.allowed_unit("bit/kbyte"))
@@ -59,6 +82,29 @@ class PvChecksTest(unittest.TestCase):
         self.assertTrue(pv.allowed_unit("1 / m ^ 2"))
         self.assertFalse(pv.allowed_unit("m^-2"))
 
+    def test_allowed_unit_every_powered_unit_checked(self):
+        self.assertTrue(pv.allowed_unit("m^2 s^2"))
+        self.assertFalse(pv.allowed_unit("m^2 s^-2"))
+        self.assertFalse(pv.allowed_unit("BADUNIT^2 m^2"))
+
+    def test_allowed_unit_product(self):
+        self.assertTrue(pv.allowed_unit("W s"))
+        self.assertFalse(pv.allowed_unit("kW h"))
+
+    def test_allowed_unit_incomplete_quotient(self):
+        self.assertFalse(pv.allowed_unit("m/"))
+        self.assertFalse(pv.allowed_unit("/m"))
+
+    def test_allowed_unit_number_only_as_numerator(self):
+        self.assertTrue(pv.allowed_unit("1/s^2"))
+        self.assertFalse(pv.allowed_unit("2/s"))
+        self.assertFalse(pv.allowed_unit("m/1"))
+
+    def test_allowed_unit_macros(self):
+        self.assertTrue(pv.allowed_unit("$(EGU)"))
+        self.assertTrue(pv.allowed_unit("$(EGU=mA)/s"))
+        self.assertFalse(pv.allowed_unit("$(EGU=BADUNIT)"))
+
     # need to know some valid macros of units to test that portion of allow units
 
     def test_get_multiple_instances_empty(self):
@@ -762,3 +808,308 @@ class PvChecksTest(unittest.TestCase):
             ],
         )
         self.assertEqual(len(pv.get_log_info_tags(test_db)), 8)
+
+    def test_run_checks_visits_each_record_once(self):
+        checks = [CountingCheck(), CountingCheck()]
+        pv.run_checks(ec.Db("path", self.record_list), checks)
+
+        for check in checks:
+            self.assertListEqual(check.visited, self.record_name_list)
+
+    def test_run_pv_checks_matches_individual_checks(self):
+        test_db = ec.Db(
+            "path",
+            [
+                ec.Record("calc", "CALC", [ec.Field("INTEREST", "HIGH")], [], []),
+                ec.Record("ai", "AI", [ec.Field("log_period_pv", "A")], [ec.Field("EGU", "x")], []),
+                ec.Record("ai", "AI", [ec.Field("log_period_seconds", "1")], [], []),
+            ],
+        )
+        errors = []
+        for check in [
+            pv.get_interest_descriptions,
+            pv.get_units_valid,
+            pv.get_desc_length,
+            pv.get_interest_calc_readonly,
+            pv.get_interest_units,
+            pv.get_multiple_properties_on_pvs,
+            pv.get_log_info_tags,
+        ]:
+            errors.extend(check(test_db))
+
+        self.assertEqual(len(errors), 4)
+        self.assertEqual(pv.run_pv_checks(test_db), (pv.get_multiple_instances(test_db), errors))
+
+    def test_allowed_unit_verdicts_are_cached(self):
+        pv.unit_verdicts.clear()
+        self.assertTrue(pv.allowed_unit("mA"))
+        self.assertTrue(pv.allowed_unit("mA"))
+        self.assertFalse(pv.allowed_unit("BADUNIT"))
+
+        self.assertEqual(pv.unit_verdicts.hits, 1)
+        self.assertEqual(pv.unit_verdicts.misses, 2)
+        self.assertDictEqual(pv.unit_verdicts.export_table(), {"mA": True, "BADUNIT": False})
+
+    def test_unit_verdict_cache_is_bounded(self):
+        cache = pv.UnitVerdictCache(maxsize=2)
+        cache.put("m", True)
+        cache.put("s", True)
+        cache.get("m")
+        cache.put("K", True)
+
+        self.assertListEqual(list(cache.export_table()), ["m", "K"])
+
+    def test_unit_verdict_cache_load_table(self):
+        cache = pv.UnitVerdictCache()
+        cache.load_table({"m": True, "BADUNIT": False})
+
+        self.assertFalse(cache.get("BADUNIT"))
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(len(cache), 2)
+
+    def test_is_prefixed_unit(self):
+        self.assertTrue(pv.is_prefixed_unit("mA"))
+        self.assertTrue(pv.is_prefixed_unit("kHz"))
+        self.assertFalse(pv.is_prefixed_unit("A"))
+        self.assertFalse(pv.is_prefixed_unit("kkm"))
+
+    def test_configure_units_rebuilds_prefixed_units(self):
+        original = pv.allowed_prefixable_units
+        try:
+            self.assertTrue(pv.allowed_unit("mA"))
+            pv.configure_units(prefixable_units={"furlong"})
+            self.assertTrue(pv.is_prefixed_unit("kfurlong"))
+            self.assertFalse(pv.is_prefixed_unit("mA"))
+            self.assertFalse(pv.allowed_unit("mA"))
+        finally:
+            pv.configure_units(prefixable_units=original)
+        self.assertTrue(pv.allowed_unit("mA"))
+
+    def test_configure_units_updates_rules_digest(self):
+        original = pv.allowed_prefixable_units
+        digest = pv.rules_digest
+        try:
+            pv.configure_units(prefixable_units={"furlong"})
+            self.assertNotEqual(pv.rules_digest, digest)
+        finally:
+            pv.configure_units(prefixable_units=original)
+        self.assertEqual(pv.rules_digest, digest)
+
+    def test_run_checks_routes_records_by_declared_prerequisites(self):
+        check = CountingCheck(record_types={"calc"}, info_names={"INTEREST"})
+        test_db = ec.Db(
+            "path",
+            self.record_list
+            + [
+                ec.Record("calc", "CALC", [], [], []),
+                ec.Record("calc", "INTERESTING", [ec.Field("INTEREST", "HIGH")], [], []),
+                ec.Record("ai", "AI", [ec.Field("INTEREST", "HIGH")], [], []),
+            ],
+        )
+        pv.run_checks(test_db, [check])
+
+        self.assertListEqual(check.visited, ["INTERESTING"])
+
+    def test_registered_checks(self):
+        self.assertListEqual(
+            [check.name for check in pv.check_error],
+            [
+                "interest_descriptions",
+                "units_valid",
+                "desc_length",
+                "interest_calc_readonly",
+                "interest_units",
+                "multiple_properties",
+                "log_info_tags",
+            ],
+        )
+        self.assertListEqual([check.name for check in pv.check_warning], ["multiple_instances"])
+
+    def test_run_pv_checks_collects_stats(self):
+        test_db = ec.Db(
+            "path",
+            [
+                ec.Record("calc", "CALC", [ec.Field("INTEREST", "HIGH")], [], []),
+                ec.Record("ai", "AI", [], [ec.Field("DESC", "x" * 50)], []),
+            ],
+        )
+        stats = pv.CheckStats()
+        results = pv.run_pv_checks(test_db, stats, "a.db")
+        pv.run_pv_checks(test_db, stats, "b.db")
+
+        self.assertEqual(results, pv.run_pv_checks(test_db))
+        self.assertListEqual(list(stats.files), ["a.db", "b.db"])
+        summary = stats.to_dict()
+        self.assertEqual(summary["files"]["a.db"]["desc_length"]["records"], 1)
+        self.assertEqual(summary["files"]["a.db"]["desc_length"]["failures"], 1)
+        self.assertEqual(summary["files"]["a.db"]["interest_calc_readonly"]["records"], 1)
+        self.assertEqual(summary["totals"]["desc_length"]["records"], 2)
+        self.assertEqual(summary["totals"]["interest_descriptions"]["failures"], 2)
+        self.assertGreaterEqual(summary["totals"]["multiple_instances"]["seconds"], 0)
+
+    def test_stats_report_unit_verdicts(self):
+        test_db = ec.Db("path", [ec.Record("ai", "AI", [], [ec.Field("EGU", "mA")], [])])
+        pv.unit_verdicts.clear()
+        stats = pv.CheckStats()
+        pv.run_pv_checks(test_db, stats, "a.db")
+        pv.run_pv_checks(test_db, stats, "b.db")
+
+        self.assertDictEqual(stats.to_dict()["unit_verdicts"], {"hits": 1, "misses": 1})
+
+    def test_get_duplicate_fields(self):
+        rec = ec.Record(
+            "mbbi",
+            "MBBI",
+            [],
+            [
+                ec.Field("ZRST", "a"),
+                ec.Field("DESC", "b"),
+                ec.Field("ZRST", "c", True),
+                ec.Field("SCAN", "d", True),
+                ec.Field("DESC", "e"),
+                ec.Field("ZRST", "f"),
+                ec.Field("SCAN", "g"),
+            ],
+            [],
+        )
+        self.assertDictEqual(
+            pv.get_duplicate_fields(rec),
+            {
+                "ZRST": [(0, False), (2, True), (5, False)],
+                "DESC": [(1, False), (4, False)],
+                "SCAN": [(3, True), (6, False)],
+            },
+        )
+        self.assertListEqual(
+            pv.get_multiple_properties_on_pvs(ec.Db("path", [rec])),
+            ["Multiple instances of fields ZRST,DESC,SCAN on MBBI"],
+        )
+
+    def test_get_multiple_properties_on_pvs_first_instance_macro(self):
+        rec = ec.Record("ai", "AI", [], [ec.Field("DESC", "$(D)", True), ec.Field("DESC", "b")], [])
+        self.assertFalse(pv.get_multiple_properties_on_pvs(ec.Db("path", [rec])))
+
+    def test_check_result_cache_only_checks_changed_records(self):
+        check = CountingCheck()
+        cache = pv.CheckResultCache()
+        first = pv.run_checks(ec.Db("path", self.record_list), [check], cache=cache)
+
+        changed = ec.Record(
+            "type", self.record_name_list[0], [ec.Field("INTEREST", "HIGH")], [], []
+        )
+        records = [changed] + self.record_list[1:]
+        second = pv.run_checks(ec.Db("path", records), [check], cache=cache)
+
+        self.assertListEqual(first, second)
+        self.assertListEqual(check.visited, self.record_name_list + [self.record_name_list[0]])
+        self.assertEqual(cache.hits, len(self.record_list) - 1)
+
+        check.version += 1
+        pv.run_checks(ec.Db("path", records), [check], cache=cache)
+        self.assertEqual(len(check.visited), 2 * len(self.record_list) + 1)
+
+    def test_check_result_cache_matches_uncached_run(self):
+        test_db = ec.Db(
+            "path",
+            [
+                ec.Record("calc", "CALC", [ec.Field("INTEREST", "HIGH")], [], []),
+                ec.Record("ai", "AI", [ec.Field("log_period_pv", "A")], [ec.Field("EGU", "x")], []),
+                ec.Record("ai", "AI", [ec.Field("log_period_seconds", "1")], [], []),
+                ec.Record("ai", "DESC", [], [ec.Field("DESC", "x" * 41)], []),
+            ],
+        )
+        cache = pv.CheckResultCache()
+        expected = pv.run_pv_checks(test_db)
+
+        self.assertEqual(pv.run_pv_checks(test_db, cache=cache), expected)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(pv.run_pv_checks(test_db, cache=cache), expected)
+        self.assertEqual(cache.hits, cache.misses)
+
+    def test_check_result_cache_save_and_load(self):
+        cache = pv.CheckResultCache()
+        pv.run_pv_checks(ec.Db("path", self.record_list), cache=cache)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.cache")
+            cache.save(path)
+            loaded = pv.CheckResultCache()
+            loaded.load(path)
+            loaded.load(os.path.join(directory, "missing.cache"))
+
+        self.assertDictEqual(loaded.results, cache.results)
+
+    def test_check_result_cache_loaded_matches_uncached_run(self):
+        test_db = ec.Db(
+            "path",
+            [
+                ec.Record("ai", "AI", [ec.Field("log_period_pv", "A")], [], []),
+                ec.Record("ai", "AI", [ec.Field("log_period_seconds", "1")], [], []),
+            ],
+        )
+        cache = pv.CheckResultCache()
+        expected = pv.run_pv_checks(test_db, cache=cache)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.cache")
+            cache.save(path)
+            loaded = pv.CheckResultCache()
+            loaded.load(path)
+            self.assertListEqual(os.listdir(directory), ["results.cache"])
+
+        self.assertEqual(pv.run_pv_checks(test_db, cache=loaded), expected)
+        self.assertEqual(loaded.misses, 0)
+
+    def test_check_result_cache_ignores_invalid_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.cache")
+            for contents in [b"\x80\x04N.", b"[]", b'{"format": 2, "results": [[1]]}']:
+                with open(path, "wb") as cache_file:
+                    cache_file.write(contents)
+                cache = pv.CheckResultCache()
+                cache.load(path)
+                self.assertEqual(len(cache), 0)
+
+    def test_check_result_cache_saves_only_used_results(self):
+        cache = pv.CheckResultCache()
+        pv.run_pv_checks(ec.Db("path", self.record_list), cache=cache)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.cache")
+            cache.save(path)
+            second_run = pv.CheckResultCache()
+            second_run.load(path)
+            pv.run_pv_checks(ec.Db("path", self.record_list[1:]), cache=second_run)
+            second_run.save(path)
+            loaded = pv.CheckResultCache()
+            loaded.load(path)
+
+        self.assertGreater(second_run.hits, 0)
+        self.assertLess(len(loaded), len(cache))
+        self.assertSetEqual(set(loaded.results), second_run.used)
+
+    def test_select_checks(self):
+        self.assertListEqual(
+            pv.select_checks(), [check.name for check in pv.check_error + pv.check_warning]
+        )
+        self.assertListEqual(
+            pv.select_checks(only=["multiple_instances", "units_valid"]),
+            ["units_valid", "multiple_instances"],
+        )
+        self.assertNotIn("desc_length", pv.select_checks(skip=["desc_length"]))
+        with self.assertRaises(ValueError):
+            pv.select_checks(only=["not_a_check"])
+
+    def test_run_pv_checks_selected_checks(self):
+        test_db = ec.Db(
+            "path",
+            [
+                ec.Record("ai", "AI", [], [ec.Field("DESC", "x" * 41)], []),
+                ec.Record("ai", "AI", [], [ec.Field("EGU", "BADUNIT")], []),
+            ],
+        )
+        self.assertEqual(
+            pv.run_pv_checks(test_db, checks=["desc_length"]),
+            ([], ["Description too long on AI"]),
+        )
+        self.assertEqual(
+            pv.run_pv_checks(test_db, checks=["multiple_instances"]),
+            (["Multiple instances of AI"], []),
+        )
@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+import unittest
+
+import src.db_parser.epics_collections as ec
+import src.pv_checks as pv
+import src.rules as rules
+
+
+class RulesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "rules.json")
+        self.defaults = rules.Rules({})
+
+    def tearDown(self):
+        pv.configure_rules(self.defaults)
+        self.directory.cleanup()
+
+    def write_config(self, config):
+        with open(self.path, "w") as config_file:
+            json.dump(config, config_file)
+
+    def test_default_rules_match_built_in_tables(self):
+        self.assertEqual(self.defaults.ASG_list, frozenset(pv.ASG_list))
+        self.assertEqual(self.defaults.prefixed_units, pv.prefixed_units)
+        self.assertEqual(self.defaults.desc_max_length, 40)
+
+    def test_load_rules_overrides_given_tables(self):
+        self.write_config({"unit_prefixes": ["k"], "desc_max_length": 10})
+        loaded = rules.load_rules(self.path)
+
+        self.assertEqual(loaded.unit_prefixes, frozenset({"k"}))
+        self.assertIn("kV", loaded.prefixed_units)
+        self.assertNotIn("mV", loaded.prefixed_units)
+        self.assertEqual(loaded.ASG_list, self.defaults.ASG_list)
+        self.assertEqual(loaded.desc_max_length, 10)
+
+    def test_load_rules_sees_changes(self):
+        self.write_config({"ASG_list": ["calc", "calcout"]})
+        self.assertEqual(rules.load_rules(self.path).ASG_list, frozenset({"calc", "calcout"}))
+
+        self.write_config({"ASG_list": ["ai"]})
+        self.assertEqual(rules.load_rules(self.path).ASG_list, frozenset({"ai"}))
+        self.assertListEqual(os.listdir(self.directory.name), ["rules.json"])
+
+    def test_invalid_configs(self):
+        for config in (
+            {"EGU_lists": []},
+            {"ASG_list": "calc"},
+            {"desc_max_length": "40"},
+            {"desc_max_length": True},
+            [],
+        ):
+            self.write_config(config)
+            with self.assertRaises(rules.RulesError):
+                rules.load_rules(self.path)
+
+    def test_configure_rules_changes_checks(self):
+        self.write_config({"ASG_list": ["ai"], "desc_max_length": 5, "standalone_units": ["xyz"]})
+        pv.configure_rules(rules.load_rules(self.path))
+        test_db = ec.Db(
+            "path",
+            [
+                ec.Record(
+                    "ai", "AI", [ec.Field("INTEREST", "HIGH")], [ec.Field("DESC", "long")], []
+                ),
+                ec.Record("calc", "CALC", [ec.Field("INTEREST", "HIGH")], [], []),
+                ec.Record("ai", "DESC", [], [ec.Field("DESC", "longer")], []),
+            ],
+        )
+
+        self.assertEqual(len(pv.get_interest_calc_readonly(test_db)), 1)
+        self.assertListEqual(pv.get_desc_length(test_db), ["Description too long on DESC"])
+        self.assertTrue(pv.allowed_unit("xyz"))
+        self.assertFalse(pv.allowed_unit("cdeg/ss"))
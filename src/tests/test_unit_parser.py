@@ -0,0 +1,70 @@
+import unittest
+
+import src.unit_parser as up
+
+
+class UnitParserTest(unittest.TestCase):
+    def test_tokenise(self):
+        self.assertListEqual(
+            up.tokenise("km/(m s^-2)"),
+            [
+                ("unit", "km"),
+                ("op", "/"),
+                ("op", "("),
+                ("unit", "m"),
+                ("unit", "s"),
+                ("op", "^"),
+                ("op", "-"),
+                ("number", "2"),
+                ("op", ")"),
+            ],
+        )
+
+    def test_tokenise_invalid_character(self):
+        with self.assertRaises(up.UnitSyntaxError):
+            up.tokenise("m*s")
+
+    def test_tokenise_touching_atoms(self):
+        for text in ["%%", "%mA", "%K", "2m"]:
+            with self.assertRaises(up.UnitSyntaxError):
+                up.tokenise(text)
+
+    def test_tokenise_unit_after_exponent(self):
+        self.assertListEqual(
+            up.tokenise("m^2s"),
+            [("unit", "m"), ("op", "^"), ("number", "2"), ("unit", "s")],
+        )
+
+    def test_parse_unit(self):
+        self.assertEqual(up.parse_unit("mA"), ("unit", "mA"))
+
+    def test_parse_product(self):
+        self.assertEqual(up.parse_unit("uA hour"), ("product", (("unit", "uA"), ("unit", "hour"))))
+
+    def test_parse_quotient_with_parentheses(self):
+        self.assertEqual(
+            up.parse_unit("1/(m s)"),
+            ("quotient", ("number", "1"), ("product", (("unit", "m"), ("unit", "s")))),
+        )
+
+    def test_parse_quotients_are_left_associative(self):
+        self.assertEqual(
+            up.parse_unit("m/s/s"),
+            ("quotient", ("quotient", ("unit", "m"), ("unit", "s")), ("unit", "s")),
+        )
+
+    def test_parse_every_power(self):
+        self.assertEqual(
+            up.parse_unit("m^2 s^-1"),
+            ("product", (("power", ("unit", "m"), "2"), ("power", ("unit", "s"), "-1"))),
+        )
+
+    def test_parse_invalid_syntax(self):
+        for text in ["m^", "m^s", "(m", "m)", "m^2^3"]:
+            self.assertIsNone(up.parse_unit(text), text)
+
+    def test_iter_nodes_marks_numerators(self):
+        numerators = [
+            node for node, is_numerator in up.iter_nodes(up.parse_unit("1/m")) if is_numerator
+        ]
+        self.assertListEqual(numerators, [("number", "1")])
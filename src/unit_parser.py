@@ -0,0 +1,164 @@
+"""
+Parser for compound engineering units (EGU), such as "m/s", "1/cm", "km/(m s)" or "m^2".
+
+Grammar:
+    expression := product ("/" product)*
+    product    := factor*
+    factor     := atom ("^" exponent)?
+    atom       := UNIT | NUMBER | "(" expression ")"
+    exponent   := "-"? NUMBER
+
+Units are multiplied by separating them with whitespace or parentheses. Parse trees are
+nested tuples:
+    ("unit", name)
+    ("number", text)
+    ("power", base, exponent)          exponent is the exponent text, e.g. "2" or "-1"
+    ("product", (factor, ...))
+    ("quotient", numerator, denominator)
+"""
+
+import re
+from functools import lru_cache
+
+_TOKEN = re.compile(r"\s*(?:(?P<unit>[^\W\d_][\w%]*|%)|(?P<number>\d+(?:\.\d+)?)|(?P<op>[/^()\-]))")
+
+
+class UnitSyntaxError(ValueError):
+    """
+    Error that gets raised if a unit expression could not be parsed.
+    """
+
+
+def tokenise(text):
+    """
+    This method splits a unit expression into (kind, text) tokens, where kind is "unit",
+    "number" or "op"
+    """
+    tokens = []
+    position = 0
+    end = len(text.rstrip())
+    while position < end:
+        match = _TOKEN.match(text, position)
+        if match is None:
+            raise UnitSyntaxError("Unexpected character at {} in '{}'".format(position, text))
+        kind = match.lastgroup
+        # Atoms must be separated by whitespace, a parenthesis or an operator, e.g. "%mA" is
+        # not a product of % and mA. An exponent may be followed directly by a unit.
+        touching = match.start(kind) == position
+        if touching and kind != "op" and tokens and tokens[-1][0] != "op":
+            if not (kind == "unit" and _is_exponent(tokens)):
+                raise UnitSyntaxError("Missing separator at {} in '{}'".format(position, text))
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+    return tokens
+
+
+def _is_exponent(tokens):
+    # Whether the last token is the number of an exponent, e.g. the 2 of "^2" or "^-2"
+    if tokens[-1][0] != "number":
+        return False
+    return tokens[-2:-1] == [("op", "^")] or tokens[-3:-1] == [("op", "^"), ("op", "-")]
+
+
+class _UnitParser:
+    def __init__(self, text):
+        self.text = text
+        self.tokens = tokenise(text)
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None, None
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def error(self, message):
+        raise UnitSyntaxError("{} in '{}'".format(message, self.text))
+
+    def expect(self, op):
+        if self.take() != ("op", op):
+            self.error("Expected '{}'".format(op))
+
+    def parse(self):
+        tree = self.expression()
+        if self.position != len(self.tokens):
+            self.error("Unexpected '{}'".format(self.peek()[1]))
+        return tree
+
+    def expression(self):
+        tree = self.product()
+        while self.peek() == ("op", "/"):
+            self.take()
+            tree = ("quotient", tree, self.product())
+        return tree
+
+    def product(self):
+        factors = []
+        while self.peek()[0] in ("unit", "number") or self.peek() == ("op", "("):
+            factors.append(self.factor())
+        if len(factors) == 1:
+            return factors[0]
+        return ("product", tuple(factors))
+
+    def factor(self):
+        tree = self.atom()
+        if self.peek() == ("op", "^"):
+            self.take()
+            sign = ""
+            if self.peek() == ("op", "-"):
+                self.take()
+                sign = "-"
+            kind, exponent = self.take()
+            if kind != "number":
+                self.error("Expected a number after '^'")
+            tree = ("power", tree, sign + exponent)
+        return tree
+
+    def atom(self):
+        kind, text = self.take()
+        if kind in ("unit", "number"):
+            return kind, text
+        self.position -= 1
+        self.expect("(")
+        tree = self.expression()
+        self.expect(")")
+        return tree
+
+
+@lru_cache(maxsize=4096)
+def parse_unit(text):
+    """
+    This method parses a unit expression. Results are cached per distinct string.
+
+    Args:
+        text: the unit expression, with any macros already expanded
+    Returns:
+        The parse tree, or None if the expression is not valid syntax
+    """
+    try:
+        return _UnitParser(text).parse()
+    except UnitSyntaxError:
+        return None
+
+
+def iter_nodes(tree):
+    """
+    This method yields every node of a parse tree, along with whether it is the numerator
+    of a quotient
+    """
+    stack = [(tree, False)]
+    while stack:
+        node, is_numerator = stack.pop()
+        yield node, is_numerator
+        kind = node[0]
+        if kind == "power":
+            stack.append((node[1], False))
+        elif kind == "product":
+            stack.extend((factor, False) for factor in node[1])
+        elif kind == "quotient":
+            stack.append((node[1], True))
+            stack.append((node[2], False))